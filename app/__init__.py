@@ -0,0 +1,6 @@
+from dotenv import load_dotenv
+
+# db, metrics, logger, llm_cache and the other modules read their settings
+# from the environment when they are imported, so .env has to be loaded
+# before any of them; variables already set in the environment win.
+load_dotenv()
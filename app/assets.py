@@ -0,0 +1,124 @@
+import os
+import gzip
+import json
+import hashlib
+import mimetypes
+from typing import Dict, Optional
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+from fastapi.staticfiles import StaticFiles
+
+try:  # optional: only needed to build .br variants
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Precompressed, content-hashed copies of app/static, built ahead of time
+# (`recipes-app assets`, done in the Docker build) so the Pi never compresses
+# at request time. Templates link via static_url("styles.css"), which resolves
+# to /static/dist/styles.<hash>.css when a build exists and to the plain file
+# otherwise.
+STATIC_DIR = "app/static"
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+_COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".txt", ".html")
+_IMMUTABLE = "public, max-age=31536000, immutable"
+
+_manifest: Optional[Dict[str, str]] = None
+
+
+def build(static_dir: str = STATIC_DIR) -> Dict[str, str]:
+    """Writes hashed, gzip- and (if available) brotli-compressed copies plus a manifest."""
+    dist = os.path.join(static_dir, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    manifest: Dict[str, str] = {}
+    keep = {MANIFEST}
+    for name in sorted(os.listdir(static_dir)):
+        src = os.path.join(static_dir, name)
+        if not os.path.isfile(src):
+            continue
+        with open(src, "rb") as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+        variants = {hashed: data}
+        if ext in _COMPRESSIBLE:
+            # mtime=0 keeps the .gz byte-identical across builds
+            variants[hashed + ".gz"] = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli is not None:
+                variants[hashed + ".br"] = brotli.compress(data, quality=11)
+        for out_name, blob in variants.items():
+            keep.add(out_name)
+            with open(os.path.join(dist, out_name), "wb") as f:
+                f.write(blob)
+        manifest[name] = f"{DIST_DIR}/{hashed}"
+    for stale in set(os.listdir(dist)) - keep:
+        os.remove(os.path.join(dist, stale))
+    with open(os.path.join(dist, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def static_url(name: str) -> str:
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(os.path.join(STATIC_DIR, DIST_DIR, MANIFEST), encoding="utf-8") as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return f"/static/{_manifest.get(name, name)}"
+
+
+def _accepted(headers: Headers) -> set:
+    out = set()
+    for part in headers.get("accept-encoding", "").split(","):
+        token, _, params = part.partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        out.add(token.strip().lower())
+    return out
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves prebuilt .br/.gz siblings of hashed assets with immutable caching."""
+
+    async def get_response(self, path: str, scope):
+        hashed = path.startswith(DIST_DIR + "/") and not path.endswith(MANIFEST)
+        if hashed and scope["method"] in ("GET", "HEAD"):
+            headers = Headers(scope=scope)
+            accepted = _accepted(headers)
+            for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(
+                    self.lookup_path, path + suffix
+                )
+                if stat_result is None:
+                    continue
+                response = FileResponse(
+                    full_path,
+                    stat_result=stat_result,
+                    media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+                    headers={
+                        "Content-Encoding": encoding,
+                        "Vary": "Accept-Encoding",
+                        "Cache-Control": _IMMUTABLE,
+                    },
+                )
+                if self.is_not_modified(response.headers, headers):
+                    return NotModifiedResponse(response.headers)
+                return response
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = _IMMUTABLE if hashed else "no-cache"
+            if hashed:
+                response.headers["Vary"] = "Accept-Encoding"
+        return response
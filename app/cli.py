@@ -0,0 +1,127 @@
+import sys
+import json
+import argparse
+from . import db
+
+
+def _cmd_import(args) -> int:
+    db.init_db()
+    src = sys.stdin.buffer if args.file == "-" else open(args.file, "rb")
+    with src:
+        report = db.import_recipes(src, batch_size=args.batch_size, defer_fts=args.defer_fts)
+    print(json.dumps(report, ensure_ascii=False, indent=2), file=sys.stderr)
+    return 0 if not report["failed"] else 1
+
+
+def _cmd_export(args) -> int:
+    db.init_db()
+    out = sys.stdout if args.file == "-" else open(args.file, "w", encoding="utf-8")
+    n = 0
+    with out:
+        for line in db.export_recipes():
+            out.write(line)
+            n += 1
+    print(f"{n} Rezepte exportiert", file=sys.stderr)
+    return 0
+
+
+def _cmd_reindex(args) -> int:
+    db.init_db()
+    n = db.reindex_recipes()
+    print(f"{n} Rezepte neu indiziert", file=sys.stderr)
+    return 0
+
+
+def _cmd_convert(args) -> int:
+    db.init_db()
+    n = db.convert_storage(args.format)
+    print(f"{n} Rezepte ins Format {args.format} umgeschrieben", file=sys.stderr)
+    return 0
+
+
+def _cmd_maintain(args) -> int:
+    db.init_db()
+    report = db.maintain(backup_path=args.backup, enable_incremental=args.enable_incremental)
+    print(json.dumps(report, ensure_ascii=False, indent=2), file=sys.stderr)
+    return 0
+
+
+def _cmd_assets(args) -> int:
+    from . import assets
+
+    manifest = assets.build()
+    extra = "" if assets.brotli is not None else " (ohne Brotli: Paket 'brotli' fehlt)"
+    print(f"{len(manifest)} statische Dateien gebaut{extra}", file=sys.stderr)
+    return 0
+
+
+def _cmd_startup_check(args) -> int:
+    from . import startup
+
+    failures = startup.check(
+        runs=args.runs, db_path=args.db, max_seconds=args.max_seconds, max_rss_mb=args.max_rss_mb
+    )
+    for failure in failures:
+        print(f"✗ {failure}", file=sys.stderr)
+    if not failures:
+        print("✓ Start innerhalb des Budgets", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="recipes-app", description="Wartung der Rezeptdatenbank")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="Rezepte aus NDJSON importieren")
+    p.add_argument("file", help="NDJSON-Datei oder - für stdin")
+    p.add_argument("--batch-size", type=int, default=500)
+    p.add_argument(
+        "--defer-fts",
+        action="store_true",
+        help="FTS-Index erst am Ende einmal neu aufbauen (schneller bei großen Importen)",
+    )
+    p.set_defaults(func=_cmd_import)
+
+    p = sub.add_parser("export", help="Alle Rezepte als NDJSON exportieren")
+    p.add_argument("file", nargs="?", default="-", help="Zieldatei oder - für stdout")
+    p.set_defaults(func=_cmd_export)
+
+    p = sub.add_parser("reindex", help="Abgeleitete Tabellen (Zutaten, Tags, Ähnlichkeits-Signaturen) neu aufbauen")
+    p.set_defaults(func=_cmd_reindex)
+
+    p = sub.add_parser("convert", help="Gespeicherte Rezepte online in ein anderes Speicherformat umschreiben")
+    p.add_argument(
+        "--format",
+        choices=sorted(db.STORAGE_FORMATS),
+        default=db.RECIPE_STORAGE_FORMAT,
+        help="Zielformat (Standard: RECIPE_STORAGE_FORMAT)",
+    )
+    p.set_defaults(func=_cmd_convert)
+
+    p = sub.add_parser("maintain", help="FTS optimieren, freie Seiten freigeben, optional Online-Backup")
+    p.add_argument("--backup", default=None, help="Backup-Datei (SQLite-Backup-API, blockiert keine Leser)")
+    p.add_argument(
+        "--enable-incremental",
+        action="store_true",
+        help="Ältere Datenbank einmalig auf auto_vacuum=INCREMENTAL umstellen (volles VACUUM)",
+    )
+    p.set_defaults(func=_cmd_maintain)
+
+    p = sub.add_parser("assets", help="Statische Dateien gehasht und vorkomprimiert (gzip/brotli) bauen")
+    p.set_defaults(func=_cmd_assets)
+
+    p = sub.add_parser(
+        "startup-check", help="Kaltstart-Zeit und RSS im Leerlauf gegen das Budget prüfen"
+    )
+    p.add_argument("--runs", type=int, default=3, help="Anzahl Starts (verglichen wird der Median)")
+    p.add_argument("--db", default=None, help="Datenbank für den Probestart (Standard: DB_PATH)")
+    p.add_argument("--max-seconds", type=float, default=None, help="Standard: STARTUP_BUDGET_SECONDS")
+    p.add_argument("--max-rss-mb", type=float, default=None, help="Standard: IDLE_RSS_BUDGET_MB")
+    p.set_defaults(func=_cmd_startup_check)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
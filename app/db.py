@@ -1,108 +1,673 @@
+import os
 import sqlite3
 import re
+import zlib
+import threading
 from contextlib import contextmanager
-from typing import Optional
-from .schemas import Recipe
+import time
+import html
+import base64
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .schemas import Recipe, RecipeSummary, RecipeFilters, PantryMatch, SimilarRecipe
+from .ingredients import ingredient_names
+from . import similarity
+from .metrics import db_timed
 import json, secrets
+from json.encoder import encode_basestring, encode_basestring_ascii
 
-DB_PATH = "recipes.db"
+DB_PATH = os.getenv("DB_PATH", "recipes.db")
+
+# Connection tuning, sized for a Raspberry Pi 3 (1 GB RAM, SD card storage).
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "8192"))
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(64 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_STATEMENT_CACHE = int(os.getenv("SQLITE_STATEMENT_CACHE", "256"))
+# WAL lets readers run concurrently with the writer. Set to DELETE if the
+# database lives on a filesystem without shared-memory support.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+
+# Storage format for newly saved recipes; existing rows keep theirs until
+# `recipes-app convert` rewrites them. Every row records its own format.
+#   json    - full document in data, ingredients/steps again as plain columns
+#   compact - data holds only what has no column (tags, ingredients, steps)
+#   zlib    - compact, zlib-compressed
+RECIPE_STORAGE_FORMAT = os.getenv("RECIPE_STORAGE_FORMAT", "json")
+STORAGE_FORMATS = {"json": 0, "compact": 1, "zlib": 2}
+_STORAGE_FMT = STORAGE_FORMATS[RECIPE_STORAGE_FORMAT]
+
+# Connections are pooled per (path, readonly): a get_conn block checks one
+# out and returns it, with its warm page cache and prepared statement cache.
+# At most SQLITE_POOL_SIZE read connections and one write connection (writes
+# are serialized anyway) stay open per database; extra ones opened during a
+# burst are closed on return. So the page caches stay bounded however many
+# threads the FastAPI threadpool and asyncio.to_thread run: with the defaults
+# at most 5 x SQLITE_CACHE_KB (40 MB) for recipes.db.
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+_idle: Dict[Tuple[str, bool], List[sqlite3.Connection]] = {}
+_idle_lock = threading.Lock()
+# Connections checked out by the current thread; nested get_conn blocks for
+# the same key share one (and thus its transaction), as before pooling.
+_held = threading.local()
+
+
+def connect(path: str, readonly: bool = False) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path,
+        cached_statements=SQLITE_STATEMENT_CACHE,
+        # Pooled connections move between threads (one at a time), and
+        # close_all() may run on yet another.
+        check_same_thread=False,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    if readonly:
+        conn.execute("PRAGMA query_only=ON")
+    # Used by the decoding FTS source (see _wire_fts); once a database holds
+    # compact rows, every connection that writes recipes needs it.
+    conn.create_function("recipe_text", 4, _recipe_text, deterministic=True)
+    return conn
+
+
+def _checkout(key: Tuple[str, bool]) -> sqlite3.Connection:
+    with _idle_lock:
+        idle = _idle.get(key)
+        if idle:
+            return idle.pop()
+    return connect(*key)
+
+
+def _checkin(key: Tuple[str, bool], conn: sqlite3.Connection) -> None:
+    with _idle_lock:
+        idle = _idle.setdefault(key, [])
+        if len(idle) < (SQLITE_POOL_SIZE if key[1] else 1):
+            idle.append(conn)
+            return
+    conn.close()
 
 
 @contextmanager
-def get_conn():
-    conn = sqlite3.connect(DB_PATH)
+def get_conn(readonly: bool = False, path: Optional[str] = None):
+    """Yields a pooled connection for ``path`` (default: DB_PATH).
+
+    Read connections are ``query_only`` and never hold a transaction between
+    statements, so with WAL they never wait behind a writer. Write connections
+    commit when the block exits and roll back on error.
+    """
+    key = (path or DB_PATH, readonly)
+    held = _held.__dict__.setdefault("conns", {})
+    conn = held.get(key)
+    owner = conn is None
+    if owner:
+        conn = held[key] = _checkout(key)
     try:
-        conn.row_factory = sqlite3.Row
-        yield conn
-        conn.commit()
+        if readonly:
+            yield conn
+            return
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
     finally:
-        conn.close()
+        if owner:
+            held.pop(key, None)
+            _checkin(key, conn)
 
 
-def init_db() -> None:
-    with get_conn() as conn:
+def close_all() -> None:
+    """Closes the idle connections; checked-out ones go back to the pool."""
+    with _idle_lock:
+        conns = [conn for idle in _idle.values() for conn in idle]
+        _idle.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+def _doc(fmt: int, data: Union[str, bytes]) -> dict:
+    """tags, ingredients and steps of a compact row."""
+    if fmt == 2:
+        data = zlib.decompress(data)
+    return json.loads(data)
+
+
+def _recipe_text(fmt: int, data: Union[str, bytes], plain: str, field: str) -> str:
+    # SQL recipe_text(fmt, data, plain, field): ingredients or steps as
+    # newline-joined text, from the plain column (json rows) or the document.
+    if not fmt:
+        return plain
+    return "\n".join(_doc(fmt, data)[field])
+
+
+def _fts_columns(row: str, decoded: bool) -> str:
+    # ingredients/steps of the trigger row ("new" or "old") for recipes_fts
+    if not decoded:
+        return f"{row}.ingredients_text, {row}.steps_text"
+    return (
+        f"recipe_text({row}.fmt, {row}.data, {row}.ingredients_text, 'ingredients'), "
+        f"recipe_text({row}.fmt, {row}.data, {row}.steps_text, 'steps')"
+    )
+
+
+def _fts_insert_trigger(decoded: bool) -> str:
+    return f"""CREATE TRIGGER IF NOT EXISTS recipes_ai AFTER INSERT ON recipes BEGIN
+        INSERT INTO recipes_fts(rowid, title, ingredients_text, steps_text)
+        VALUES (new.id, new.title, {_fts_columns("new", decoded)});
+    END;"""
+
+
+def _fts_decoded(c) -> bool:
+    """Whether recipes_fts reads through the decoding recipes_doc view."""
+    return c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='view' AND name='recipes_doc'"
+    ).fetchone() is not None
+
+
+def _has_compact_rows(c) -> bool:
+    return c.execute("SELECT 1 FROM recipes WHERE fmt != 0 LIMIT 1").fetchone() is not None
+
+
+def _wire_fts(c, decoded: bool) -> None:
+    # recipes_fts has two possible sources. Plain: the ingredients_text and
+    # steps_text columns, as before storage formats existed; any SQLite client
+    # can write recipes. Decoding: the recipes_doc view and triggers calling
+    # recipe_text(), needed as soon as compact rows exist; writing recipes
+    # (including DELETE) then only works on connections from connect().
+    # Recreates table and triggers for the given source and rebuilds the index.
+    for trigger in ("recipes_ai", "recipes_ad", "recipes_au"):
+        c.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    c.execute("DROP TABLE IF EXISTS recipes_fts")
+    if decoded:
+        c.execute("""CREATE VIEW IF NOT EXISTS recipes_doc AS
+            SELECT id, title,
+                   recipe_text(fmt, data, ingredients_text, 'ingredients') AS ingredients_text,
+                   recipe_text(fmt, data, steps_text, 'steps') AS steps_text
+            FROM recipes""")
+    else:
+        c.execute("DROP VIEW IF EXISTS recipes_doc")
+    content = "recipes_doc" if decoded else "recipes"
+    c.execute(f"""CREATE VIRTUAL TABLE recipes_fts
+        USING fts5(title, ingredients_text, steps_text, content='{content}', content_rowid='id')
+    """)
+    c.execute(_fts_insert_trigger(decoded))
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS recipes_ad AFTER DELETE ON recipes BEGIN
+        INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients_text, steps_text)
+        VALUES('delete', old.id, old.title, {_fts_columns("old", decoded)});
+    END;""")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS recipes_au AFTER UPDATE ON recipes BEGIN
+        INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients_text, steps_text)
+        VALUES('delete', old.id, old.title, {_fts_columns("old", decoded)});
+        INSERT INTO recipes_fts(rowid, title, ingredients_text, steps_text)
+        VALUES (new.id, new.title, {_fts_columns("new", decoded)});
+    END;""")
+    c.execute("INSERT INTO recipes_fts(recipes_fts) VALUES('rebuild')")
+
+
+def _use_decoded_fts(conn: sqlite3.Connection) -> None:
+    """Switches recipes_fts to the decoding source before compact rows get written."""
+    if _fts_decoded(conn):
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    # another worker may have switched it while we waited for the lock
+    if not _fts_decoded(conn):
+        _wire_fts(conn, True)
+    conn.commit()
+
+
+# Title-only FTS indexes for search-as-you-type: a prefix index ("Kart" ->
+# "Kartoffelsuppe") and a trigram index for substrings inside German
+# compounds ("suppe" -> "Kartoffelsuppe"). Both read titles from recipes.
+_SUGGEST_INDEXES = {
+    "recipes_suggest": "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'",
+    "recipes_trigram": "tokenize='trigram'",
+}
+
+
+def _suggest_ddl(table: str) -> List[str]:
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {table}
+            USING fts5(title, content='recipes', content_rowid='id', {_SUGGEST_INDEXES[table]})""",
+        _suggest_insert_trigger(table),
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON recipes BEGIN
+            INSERT INTO {table}({table}, rowid, title) VALUES('delete', old.id, old.title);
+        END;""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF title ON recipes BEGIN
+            INSERT INTO {table}({table}, rowid, title) VALUES('delete', old.id, old.title);
+            INSERT INTO {table}(rowid, title) VALUES (new.id, new.title);
+        END;""",
+    ]
+
+
+def _suggest_insert_trigger(table: str) -> str:
+    return f"""CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON recipes BEGIN
+            INSERT INTO {table}(rowid, title) VALUES (new.id, new.title);
+        END;"""
+
+
+def _suggest_tables(conn: sqlite3.Connection) -> List[str]:
+    """Suggest indexes present in this database (trigram needs SQLite >= 3.34)."""
+    marks = ",".join("?" * len(_SUGGEST_INDEXES))
+    rows = conn.execute(
+        f"SELECT name FROM sqlite_master WHERE type='table' AND name IN ({marks})",
+        tuple(_SUGGEST_INDEXES),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+# Bump when _after_insert starts maintaining another lookup table; init_db
+# then backfills existing rows once.
+_DERIVED_VERSION = 3
+
+
+def _m001_recipes(c: sqlite3.Cursor) -> None:
+    c.execute("""CREATE TABLE IF NOT EXISTS recipes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        slug TEXT UNIQUE NOT NULL,
+        title TEXT NOT NULL,
+        servings INTEGER NOT NULL,
+        time_minutes INTEGER NOT NULL,
+        difficulty INTEGER NOT NULL,
+        ingredient_load INTEGER NOT NULL,
+        tags TEXT NOT NULL,
+        data TEXT NOT NULL,
+        ingredients_text TEXT NOT NULL,
+        steps_text TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT (datetime('now'))
+    )""")
+    c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts
+        USING fts5(title, ingredients_text, steps_text, content='recipes', content_rowid='id')
+    """)
+    c.execute("""CREATE TRIGGER IF NOT EXISTS recipes_ai AFTER INSERT ON recipes BEGIN
+        INSERT INTO recipes_fts(rowid, title, ingredients_text, steps_text)
+        VALUES (new.id, new.title, new.ingredients_text, new.steps_text);
+    END;""")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS recipes_ad AFTER DELETE ON recipes BEGIN
+        INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients_text, steps_text)
+        VALUES('delete', old.id, old.title, old.ingredients_text, old.steps_text);
+    END;""")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS recipes_au AFTER UPDATE ON recipes BEGIN
+        INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients_text, steps_text)
+        VALUES('delete', old.id, old.title, old.ingredients_text, old.steps_text);
+        INSERT INTO recipes_fts(rowid, title, ingredients_text, steps_text)
+        VALUES (new.id, new.title, new.ingredients_text, new.steps_text);
+    END;""")
+    # Keyset pagination of the newest-first list walks this index.
+    c.execute("CREATE INDEX IF NOT EXISTS idx_recipes_created_id ON recipes(created_at, id)")
+    c.execute("CREATE TABLE IF NOT EXISTS app_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+
+def _m002_ingredients(c: sqlite3.Cursor) -> None:
+    # Normalized ingredient names per recipe for pantry queries. total is
+    # the recipe's ingredient count, denormalized so that ranking by
+    # missing ingredients reads nothing but the (name, recipe_id) key.
+    c.execute("""CREATE TABLE IF NOT EXISTS recipe_ingredients (
+        name TEXT NOT NULL,
+        recipe_id INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        PRIMARY KEY (name, recipe_id)
+    ) WITHOUT ROWID""")
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_recipe
+           ON recipe_ingredients(recipe_id)"""
+    )
+    c.execute("""CREATE TRIGGER IF NOT EXISTS recipes_ad_ingredients AFTER DELETE ON recipes BEGIN
+        DELETE FROM recipe_ingredients WHERE recipe_id = old.id;
+    END;""")
+
+
+def _m003_tags_and_facets(c: sqlite3.Cursor) -> None:
+    # Normalized tags (lowercase, without '#') for facet filtering.
+    c.execute("""CREATE TABLE IF NOT EXISTS recipe_tags (
+        tag TEXT NOT NULL,
+        recipe_id INTEGER NOT NULL,
+        PRIMARY KEY (tag, recipe_id)
+    ) WITHOUT ROWID""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_recipe_tags_recipe ON recipe_tags(recipe_id)")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS recipes_ad_tags AFTER DELETE ON recipes BEGIN
+        DELETE FROM recipe_tags WHERE recipe_id = old.id;
+    END;""")
+    # Facet filters: equality on difficulty/ingredient_load, range on time.
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_recipes_facets
+           ON recipes(difficulty, ingredient_load, time_minutes)"""
+    )
+    c.execute("CREATE INDEX IF NOT EXISTS idx_recipes_time ON recipes(time_minutes)")
+
+
+def _m004_recipe_pool(c: sqlite3.Cursor) -> None:
+    # Pre-generated random recipes waiting to be served (see recipe_pool.py).
+    c.execute("""CREATE TABLE IF NOT EXISTS recipe_pool (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        difficulty INTEGER NOT NULL,
+        ingredient_load INTEGER NOT NULL,
+        servings INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT (datetime('now'))
+    )""")
+    c.execute(
+        """CREATE INDEX IF NOT EXISTS idx_recipe_pool_bucket
+           ON recipe_pool(difficulty, ingredient_load, servings, id)"""
+    )
+
+
+def _m005_suggest(c: sqlite3.Cursor) -> None:
+    existing = set(_suggest_tables(c.connection))
+    for table in _SUGGEST_INDEXES:
+        try:
+            for ddl in _suggest_ddl(table):
+                c.execute(ddl)
+        except sqlite3.OperationalError:
+            # e.g. "no such tokenizer: trigram" on old SQLite builds;
+            # suggest_titles then works with the prefix index alone.
+            continue
+        if table not in existing:
+            c.execute(f"INSERT INTO {table}({table}) VALUES('rebuild')")
+
+
+def _m006_similarity(c: sqlite3.Cursor) -> None:
+    # MinHash signature per recipe plus one LSH bucket row per band (see
+    # similarity.py); lookups read a few buckets instead of every signature.
+    c.execute("""CREATE TABLE IF NOT EXISTS recipe_minhash (
+        recipe_id INTEGER PRIMARY KEY,
+        sig BLOB NOT NULL
+    )""")
+    c.execute("""CREATE TABLE IF NOT EXISTS recipe_lsh (
+        bucket INTEGER NOT NULL,
+        recipe_id INTEGER NOT NULL,
+        PRIMARY KEY (bucket, recipe_id)
+    ) WITHOUT ROWID""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_recipe_lsh_recipe ON recipe_lsh(recipe_id)")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS recipes_ad_similarity AFTER DELETE ON recipes BEGIN
+        DELETE FROM recipe_minhash WHERE recipe_id = old.id;
+        DELETE FROM recipe_lsh WHERE recipe_id = old.id;
+    END;""")
+
+
+def _m007_storage_format(c: sqlite3.Cursor) -> None:
+    # Per-row storage format (RECIPE_STORAGE_FORMAT). The full-text index keeps
+    # its plain source until compact storage is actually used (_wire_fts).
+    columns = {row[1] for row in c.execute("PRAGMA table_info(recipes)")}
+    if "fmt" not in columns:
+        c.execute("ALTER TABLE recipes ADD COLUMN fmt INTEGER NOT NULL DEFAULT 0")
+
+
+# Schema migrations in order; PRAGMA user_version holds how many have been
+# applied, so a restart against an up-to-date database runs no DDL at all.
+# Append new steps, never change one that has shipped. Databases from before
+# the versioning (user_version 0) replay every step, which is harmless since
+# each statement is IF NOT EXISTS.
+_MIGRATIONS: List[Callable[[sqlite3.Cursor], None]] = [
+    _m001_recipes,
+    _m002_ingredients,
+    _m003_tags_and_facets,
+    _m004_recipe_pool,
+    _m005_suggest,
+    _m006_similarity,
+    _m007_storage_format,
+]
+SCHEMA_VERSION = len(_MIGRATIONS)
+
+
+def _migrate(conn: sqlite3.Connection) -> int:
+    """Applies pending migrations in one write transaction; returns how many ran."""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return 0
+    # IMMEDIATE takes the write lock up front, so of several workers starting
+    # at once only the first migrates; the others re-read the version after it.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
         c = conn.cursor()
-        c.execute("""CREATE TABLE IF NOT EXISTS recipes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            slug TEXT UNIQUE NOT NULL,
-            title TEXT NOT NULL,
-            servings INTEGER NOT NULL,
-            time_minutes INTEGER NOT NULL,
-            difficulty INTEGER NOT NULL,
-            ingredient_load INTEGER NOT NULL,
-            tags TEXT NOT NULL,
-            data TEXT NOT NULL,
-            ingredients_text TEXT NOT NULL,
-            steps_text TEXT NOT NULL,
-            created_at TEXT NOT NULL DEFAULT (datetime('now'))
-        )""")
-        c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts
-            USING fts5(title, ingredients_text, steps_text, content='recipes', content_rowid='id')
-        """)
-        c.execute("""CREATE TRIGGER IF NOT EXISTS recipes_ai AFTER INSERT ON recipes BEGIN
-            INSERT INTO recipes_fts(rowid, title, ingredients_text, steps_text)
-            VALUES (new.id, new.title, new.ingredients_text, new.steps_text);
-        END;""")
-        c.execute("""CREATE TRIGGER IF NOT EXISTS recipes_ad AFTER DELETE ON recipes BEGIN
-            INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients_text, steps_text)
-            VALUES('delete', old.id, old.title, old.ingredients_text, old.steps_text);
-        END;""")
-        c.execute("""CREATE TRIGGER IF NOT EXISTS recipes_au AFTER UPDATE ON recipes BEGIN
-            INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients_text, steps_text)
-            VALUES('delete', old.id, old.title, old.ingredients_text, old.steps_text);
-            INSERT INTO recipes_fts(rowid, title, ingredients_text, steps_text)
-            VALUES (new.id, new.title, new.ingredients_text, new.steps_text);
-        END;""")
+        for step in _MIGRATIONS[version:]:
+            step(c)
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return max(SCHEMA_VERSION - version, 0)
+
+
+@db_timed
+def init_db() -> int:
+    """Brings the schema up to date; returns the number of migrations applied."""
+    with get_conn() as conn:
+        # The journal mode is persistent in the database file; switching it
+        # needs an exclusive lock, so only do it when it actually differs.
+        if not conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+            # Only possible before the first table exists; lets `recipes-app
+            # maintain` return freed pages to the file system in small steps.
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        if mode.lower() != SQLITE_JOURNAL_MODE.lower():
+            conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        applied = _migrate(conn)
+        if _STORAGE_FMT:
+            _use_decoded_fts(conn)
+        row = conn.execute(
+            "SELECT value FROM app_meta WHERE key='derived_version'"
+        ).fetchone()
+        needs_backfill = int(row["value"]) if row else 0
+    if needs_backfill < _DERIVED_VERSION:
+        reindex_recipes()
+    return applied
 
 
 def _slug() -> str:
     return secrets.token_urlsafe(6)
 
 
+_INSERT_RECIPE = """INSERT INTO recipes
+    (slug, title, servings, time_minutes, difficulty, ingredient_load, tags, fmt, data,
+     ingredients_text, steps_text, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, datetime('now')))"""
+
+
+def _stored(r: Recipe, fmt: int) -> Tuple[Union[str, bytes], str, str]:
+    """(data, ingredients_text, steps_text) of ``r`` in storage format ``fmt``."""
+    if not fmt:
+        # id/slug belong to the row, not to the stored document.
+        data = {**r.model_dump(), "id": None, "slug": None}
+        return json.dumps(data, ensure_ascii=False), "\n".join(r.ingredients), "\n".join(r.steps)
+    doc = json.dumps(
+        {"tags": r.tags, "ingredients": r.ingredients, "steps": r.steps},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return (zlib.compress(doc.encode("utf-8"), 9) if fmt == 2 else doc), "", ""
+
+
+def _recipe_params(r: Recipe, created_at: Optional[str] = None) -> tuple:
+    tags_str = ",".join([t.strip() for t in r.tags])
+    return (
+        _slug(),
+        r.title,
+        r.servings,
+        r.time_minutes,
+        r.difficulty,
+        r.ingredient_load,
+        tags_str,
+        _STORAGE_FMT,
+        *_stored(r, _STORAGE_FMT),
+        created_at,
+    )
+
+
+# Stored json-format documents start like this (id and slug live in their
+# columns), so the row's values can be spliced in without parsing the rest.
+_DOC_PREFIX = '{"id": null, "slug": null, '
+
+
+def _row_data(row: sqlite3.Row) -> dict:
+    """Recipe fields of a recipes row (SELECT *), whatever its storage format."""
+    if not row["fmt"]:
+        data = json.loads(row["data"])
+        data["id"] = row["id"]
+        data["slug"] = row["slug"]
+        return data
+    return {
+        "id": row["id"],
+        "slug": row["slug"],
+        "title": row["title"],
+        "servings": row["servings"],
+        "time_minutes": row["time_minutes"],
+        "difficulty": row["difficulty"],
+        "ingredient_load": row["ingredient_load"],
+        **_doc(row["fmt"], row["data"]),
+    }
+
+
+def _row_recipe(row: sqlite3.Row) -> Recipe:
+    # One pass through pydantic's JSON parser on the spliced document instead
+    # of json.loads plus Recipe(**data). model_construct would skip the
+    # validators, but measures slower than this with pydantic 2 (bench.rows).
+    return Recipe.model_validate_json(_row_json(row))
+
+
+def _row_json(row: sqlite3.Row) -> str:
+    """The recipe of a row (SELECT *) as JSON text, spliced from the stored document."""
+    head = f'{{"id": {row["id"]}, "slug": {encode_basestring_ascii(row["slug"])}, '
+    fmt = row["fmt"]
+    if not fmt:
+        data = row["data"]
+        if data.startswith(_DOC_PREFIX):
+            return head + data[len(_DOC_PREFIX):]
+        return json.dumps(_row_data(row), ensure_ascii=False)  # written by an older version
+    doc = zlib.decompress(row["data"]).decode("utf-8") if fmt == 2 else row["data"]
+    return (
+        f'{head}"title": {encode_basestring(row["title"])}, '
+        f'"servings": {row["servings"]}, "time_minutes": {row["time_minutes"]}, '
+        f'"difficulty": {row["difficulty"]}, "ingredient_load": {row["ingredient_load"]}, '
+        + doc[1:]
+    )
+
+
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    return [t for t in dict.fromkeys(t.strip().lstrip("#").strip().casefold() for t in tags) if t]
+
+
+def _after_insert(conn: sqlite3.Connection, rows: List[Tuple[int, Recipe]]) -> None:
+    """Maintains the derived lookup tables for freshly inserted recipes."""
+    ingredient_rows = []
+    signature_rows = []
+    bucket_rows = []
+    for rid, r in rows:
+        names = ingredient_names(r.ingredients)
+        ingredient_rows += [(name, rid, len(names)) for name in names]
+        sig = similarity.signature(similarity.features(r.title, names))
+        if sig is not None:
+            signature_rows.append((rid, similarity.pack(sig)))
+            bucket_rows += [(key, rid) for key in similarity.band_keys(sig)]
+    conn.executemany(
+        "INSERT OR REPLACE INTO recipe_ingredients (name, recipe_id, total) VALUES (?, ?, ?)",
+        ingredient_rows,
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO recipe_tags (tag, recipe_id) VALUES (?, ?)",
+        [(tag, rid) for rid, r in rows for tag in normalize_tags(r.tags)],
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO recipe_minhash (recipe_id, sig) VALUES (?, ?)", signature_rows
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO recipe_lsh (bucket, recipe_id) VALUES (?, ?)", bucket_rows
+    )
+
+
+# Callbacks run with the affected ids after save_recipe/delete_recipe committed,
+# e.g. to drop cached pages. Registered via on_change().
+_change_listeners: List[Callable[[List[int]], None]] = []
+
+
+def on_change(fn: Callable[[List[int]], None]) -> Callable[[List[int]], None]:
+    _change_listeners.append(fn)
+    return fn
+
+
+def _notify(ids: List[int]) -> None:
+    for fn in _change_listeners:
+        fn(ids)
+
+
+@db_timed
 def save_recipe(r: Recipe) -> int:
     with get_conn() as conn:
         cur = conn.cursor()
-        tags_str = ",".join([t.strip() for t in r.tags])
-        ingredients_text = "\n".join(r.ingredients)
-        steps_text = "\n".join(r.steps)
-        cur.execute(
-            """INSERT INTO recipes
-                (slug, title, servings, time_minutes, difficulty, ingredient_load, tags, data, ingredients_text, steps_text)
-             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                _slug(),
-                r.title,
-                r.servings,
-                r.time_minutes,
-                r.difficulty,
-                r.ingredient_load,
-                tags_str,
-                json.dumps(r.model_dump(), ensure_ascii=False),
-                ingredients_text,
-                steps_text,
-            ),
-        )
-        return cur.lastrowid
+        cur.execute(_INSERT_RECIPE, _recipe_params(r))
+        _after_insert(conn, [(cur.lastrowid, r)])
+        rid = cur.lastrowid
+    _notify([rid])
+    return rid
 
 
-def get_recipe(recipe_id: int) -> Optional[Recipe]:
+@db_timed
+def save_recipes(recipes: List[Recipe]) -> List[int]:
+    """Saves several recipes in one transaction; returns their ids in order."""
+    if not recipes:
+        return []
     with get_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        ids = _insert_many(conn, [(r, None) for r in recipes])
+    _notify(ids)
+    return ids
+
+
+@db_timed
+def get_recipe(recipe_id: int) -> Optional[Recipe]:
+    with get_conn(readonly=True) as conn:
         row = conn.execute("SELECT * FROM recipes WHERE id=?", (recipe_id,)).fetchone()
         if not row:
             return None
-        data = json.loads(row["data"])
-        data["id"] = row["id"]
-        data["slug"] = row["slug"]
-        return Recipe(**data)
+        return _row_recipe(row)
 
 
-def search_recipes(q: str, limit: int = 25):
+@db_timed
+def recipe_json(recipe_id: int) -> Optional[str]:
+    """A saved recipe as JSON text (same shape as Recipe), or None."""
+    with get_conn(readonly=True) as conn:
+        row = conn.execute("SELECT * FROM recipes WHERE id=?", (recipe_id,)).fetchone()
+    return _row_json(row) if row else None
+
+
+@db_timed
+def recipes_json(ids: List[int]) -> Dict[int, str]:
+    """JSON text per id for the given saved recipes; unknown ids are left out."""
+    if not ids:
+        return {}
+    marks = ",".join("?" * len(ids))
+    with get_conn(readonly=True) as conn:
+        rows = conn.execute(f"SELECT * FROM recipes WHERE id IN ({marks})", ids).fetchall()
+    return {row["id"]: _row_json(row) for row in rows}
+
+
+@db_timed
+def recipe_created_at(recipe_id: int) -> Optional[str]:
+    """Version stamp for HTTP validators; saved recipes never change, ids are never reused."""
+    with get_conn(readonly=True) as conn:
+        row = conn.execute("SELECT created_at FROM recipes WHERE id=?", (recipe_id,)).fetchone()
+    return row["created_at"] if row else None
+
+
+def _fts_query(q: str) -> str:
     # Sanitize FTS query: replace punctuation (e.g., commas) with spaces
     # to avoid "fts5: syntax error near ','" and similar errors.
     # Keep unicode word characters so searches like "Käse" work.
     q = q.strip()
-    safe_q = " ".join([t for t in re.split(r"\W+", q, flags=re.UNICODE) if t])
-    with get_conn() as conn:
+    return " ".join([t for t in re.split(r"\W+", q, flags=re.UNICODE) if t])
+
+
+@db_timed
+def search_recipes(q: str, limit: int = 25):
+    safe_q = _fts_query(q)
+    with get_conn(readonly=True) as conn:
         if not safe_q:
             rows = conn.execute(
                 "SELECT * FROM recipes ORDER BY created_at DESC LIMIT ?", (limit,)
@@ -115,16 +680,625 @@ def search_recipes(q: str, limit: int = 25):
                        ORDER BY bm25(recipes_fts) LIMIT ?""",
                 (safe_q, limit),
             ).fetchall()
-        out = []
-        for row in rows:
-            data = json.loads(row["data"])
-            data["id"] = row["id"]
-            data["slug"] = row["slug"]
-            out.append(Recipe(**data))
-        return out
+        return [_row_recipe(row) for row in rows]
 
 
+@db_timed
 def delete_recipe(recipe_id: int) -> bool:
     with get_conn() as conn:
         cur = conn.execute("DELETE FROM recipes WHERE id=?", (recipe_id,))
-        return cur.rowcount > 0
+        deleted = cur.rowcount > 0
+    _notify([recipe_id])
+    return deleted
+
+
+_SUMMARY_COLUMNS = "r.id, r.title, r.time_minutes, r.difficulty, r.ingredient_load, r.created_at"
+
+
+def _encode_cursor(key: list) -> str:
+    raw = json.dumps(key, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> list:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    key = json.loads(raw)
+    if not isinstance(key, list) or len(key) != 2:
+        raise ValueError("invalid cursor")
+    return key
+
+
+def _filter_sql(
+    filters: Optional[RecipeFilters], skip: str = ""
+) -> Tuple[List[str], list]:
+    """WHERE fragments for the facet filters on alias r; ``skip`` omits one facet."""
+    clauses: List[str] = []
+    params: list = []
+    if not filters:
+        return clauses, params
+    if filters.difficulty is not None and skip != "difficulty":
+        clauses.append("r.difficulty = ?")
+        params.append(filters.difficulty)
+    if filters.ingredient_load is not None and skip != "ingredient_load":
+        clauses.append("r.ingredient_load = ?")
+        params.append(filters.ingredient_load)
+    if filters.max_time is not None and skip != "max_time":
+        clauses.append("r.time_minutes <= ?")
+        params.append(filters.max_time)
+    if skip != "tags":
+        for tag in normalize_tags(filters.tags):
+            clauses.append("r.id IN (SELECT recipe_id FROM recipe_tags WHERE tag = ?)")
+            params.append(tag)
+    return clauses, params
+
+
+@db_timed
+def list_recipe_summaries(
+    q: str = "",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    filters: Optional[RecipeFilters] = None,
+) -> Tuple[List[RecipeSummary], Optional[str]]:
+    """Returns one page of list rows plus the cursor for the next page (or None).
+
+    Without a query rows are ordered newest first and paged on (created_at, id);
+    with a query they are ordered by bm25 rank and paged on (rank, rowid). Both
+    seek directly to the page start, so deep pages cost the same as the first.
+    """
+    safe_q = _fts_query(q)
+    key = _decode_cursor(cursor) if cursor else None
+    clauses, params = _filter_sql(filters)
+    with get_conn(readonly=True) as conn:
+        if not safe_q:
+            sql = f"SELECT {_SUMMARY_COLUMNS}, r.created_at AS sort_key FROM recipes r"
+            if key:
+                clauses.append("(r.created_at, r.id) < (?, ?)")
+                params += key
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sql += " ORDER BY r.created_at DESC, r.id DESC LIMIT ?"
+        else:
+            sql = f"""SELECT {_SUMMARY_COLUMNS}, f.rank AS sort_key FROM recipes_fts f
+                       JOIN recipes r ON r.id = f.rowid
+                       WHERE recipes_fts MATCH ?"""
+            params = [safe_q] + params
+            if key:
+                clauses.append("(f.rank, f.rowid) > (?, ?)")
+                params += key
+            for clause in clauses:
+                sql += " AND " + clause
+            sql += " ORDER BY f.rank, f.rowid LIMIT ?"
+        rows = conn.execute(sql, (*params, limit + 1)).fetchall()
+    items = [
+        RecipeSummary(
+            row["id"],
+            row["title"],
+            row["time_minutes"],
+            row["difficulty"],
+            row["ingredient_load"],
+            row["created_at"],
+        )
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor([last["sort_key"], last["id"]])
+    return items, next_cursor
+
+
+# Upper bounds offered by the time facet ("bis 15 Min", ...).
+TIME_BUCKETS = (15, 30, 60)
+
+
+@db_timed
+def facet_counts(
+    q: str = "", filters: Optional[RecipeFilters] = None, tag_limit: int = 20
+) -> dict:
+    """Counts per facet value for the current query and filters.
+
+    Each facet is counted with all *other* filters applied, so the counts show
+    what selecting a different value of that facet would return.
+    """
+    safe_q = _fts_query(q)
+
+    def where(skip: str) -> Tuple[str, list]:
+        clauses, params = _filter_sql(filters, skip=skip)
+        if safe_q:
+            clauses.insert(0, "r.id IN (SELECT rowid FROM recipes_fts WHERE recipes_fts MATCH ?)")
+            params.insert(0, safe_q)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    out: dict = {}
+    with get_conn(readonly=True) as conn:
+        for facet in ("difficulty", "ingredient_load"):
+            sql, params = where(facet)
+            rows = conn.execute(
+                f"SELECT r.{facet} AS v, COUNT(*) AS n FROM recipes r{sql} GROUP BY r.{facet}",
+                params,
+            ).fetchall()
+            out[facet] = {row["v"]: row["n"] for row in rows}
+        sql, params = where("max_time")
+        sums = ", ".join(f"SUM(r.time_minutes <= {b})" for b in TIME_BUCKETS)
+        row = conn.execute(f"SELECT {sums} FROM recipes r{sql}", params).fetchone()
+        out["max_time"] = {b: row[i] or 0 for i, b in enumerate(TIME_BUCKETS)}
+        sql, params = where("")
+        out["total"] = conn.execute(f"SELECT COUNT(*) FROM recipes r{sql}", params).fetchone()[0]
+        rows = conn.execute(
+            f"""SELECT t.tag, COUNT(*) AS n FROM recipe_tags t
+                JOIN recipes r ON r.id = t.recipe_id{sql}
+                GROUP BY t.tag ORDER BY n DESC, t.tag LIMIT ?""",
+            (*params, tag_limit),
+        ).fetchall()
+        out["tags"] = {row["tag"]: row["n"] for row in rows}
+    return out
+
+
+# Sentinels for highlight(); replaced by <mark> after HTML-escaping the title.
+_HL_OPEN, _HL_CLOSE = "\x02", "\x03"
+
+
+def _highlight_html(text: str) -> str:
+    return html.escape(text).replace(_HL_OPEN, "<mark>").replace(_HL_CLOSE, "</mark>")
+
+
+@db_timed
+def suggest_titles(q: str, limit: int = 8) -> List[dict]:
+    """Title suggestions for search-as-you-type.
+
+    Every typed word is matched as a prefix first; if that yields fewer than
+    ``limit`` hits, words of three or more letters are also matched anywhere
+    inside the title via the trigram index. Returns id, title and an
+    HTML-safe ``highlight`` with <mark> around the matched parts.
+    """
+    # Single letters would expand to most of the vocabulary; the prefix index
+    # starts at two characters.
+    tokens = [t for t in re.split(r"\W+", q.strip(), flags=re.UNICODE) if len(t) >= 2]
+    if not tokens:
+        return []
+    out: List[dict] = []
+    with get_conn(readonly=True) as conn:
+        tables = _suggest_tables(conn)
+        if "recipes_suggest" in tables:
+            match = " ".join(f'"{t}"*' for t in tokens)
+            rows = conn.execute(
+                """SELECT rowid AS id, title,
+                          highlight(recipes_suggest, 0, ?, ?) AS hl
+                   FROM recipes_suggest WHERE recipes_suggest MATCH ?
+                   ORDER BY rank LIMIT ?""",
+                (_HL_OPEN, _HL_CLOSE, match, limit),
+            ).fetchall()
+            out = [{"id": r["id"], "title": r["title"], "highlight": _highlight_html(r["hl"])} for r in rows]
+        long_tokens = [t for t in tokens if len(t) >= 3]
+        if len(out) < limit and long_tokens and "recipes_trigram" in tables:
+            seen = [r["id"] for r in out]
+            match = " AND ".join(f'"{t}"' for t in long_tokens)
+            exclude = f"AND rowid NOT IN ({','.join('?' * len(seen))})" if seen else ""
+            rows = conn.execute(
+                f"""SELECT rowid AS id, title,
+                           highlight(recipes_trigram, 0, ?, ?) AS hl
+                    FROM recipes_trigram WHERE recipes_trigram MATCH ? {exclude}
+                    ORDER BY rank LIMIT ?""",
+                (_HL_OPEN, _HL_CLOSE, match, *seen, limit - len(out)),
+            ).fetchall()
+            out += [{"id": r["id"], "title": r["title"], "highlight": _highlight_html(r["hl"])} for r in rows]
+    return out
+
+
+@db_timed
+def pool_add(difficulty: int, ingredient_load: int, servings: int, data: str) -> None:
+    with get_conn() as conn:
+        conn.execute(
+            """INSERT INTO recipe_pool (difficulty, ingredient_load, servings, data)
+               VALUES (?, ?, ?, ?)""",
+            (difficulty, ingredient_load, servings, data),
+        )
+
+
+@db_timed
+def pool_take(difficulty: int, ingredient_load: int, servings: int) -> Optional[str]:
+    """Removes and returns the oldest stocked recipe JSON for the bucket, if any."""
+    with get_conn() as conn:
+        # Take the write lock before reading, so two requests can't both read
+        # (and serve) the same row. RETURNING would need SQLite 3.35.
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            """SELECT id, data FROM recipe_pool
+               WHERE difficulty=? AND ingredient_load=? AND servings=?
+               ORDER BY id LIMIT 1""",
+            (difficulty, ingredient_load, servings),
+        ).fetchone()
+        if not row:
+            return None
+        conn.execute("DELETE FROM recipe_pool WHERE id=?", (row["id"],))
+        return row["data"]
+
+
+@db_timed
+def pool_counts() -> dict:
+    with get_conn(readonly=True) as conn:
+        rows = conn.execute(
+            """SELECT difficulty, ingredient_load, servings, COUNT(*) AS n
+               FROM recipe_pool GROUP BY difficulty, ingredient_load, servings"""
+        ).fetchall()
+    return {(r["difficulty"], r["ingredient_load"], r["servings"]): r["n"] for r in rows}
+
+
+def _insert_many(conn: sqlite3.Connection, batch: List[Tuple[Recipe, Optional[str]]]) -> List[int]:
+    """Inserts a batch with one executemany and returns the new ids in order.
+
+    Must run inside a write transaction: AUTOINCREMENT ids are handed out in
+    insertion order, so the batch owns every id above the previous maximum.
+    """
+    before = conn.execute("SELECT COALESCE(MAX(id), 0) FROM recipes").fetchone()[0]
+    conn.executemany(_INSERT_RECIPE, [_recipe_params(r, created_at) for r, created_at in batch])
+    ids = [
+        row[0]
+        for row in conn.execute("SELECT id FROM recipes WHERE id > ? ORDER BY id", (before,))
+    ]
+    _after_insert(conn, list(zip(ids, (r for r, _ in batch))))
+    return ids
+
+
+def _import_created_at(value) -> Optional[str]:
+    # Must sort like datetime('now') does, since keyset paging and
+    # Last-Modified read created_at as text.
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"created_at muss ein Text sein, nicht {value!r}")
+    try:
+        datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        raise ValueError(f"created_at {value!r} nicht im Format JJJJ-MM-TT hh:mm:ss") from None
+    return value
+
+
+@db_timed
+def import_recipes(
+    lines: Iterable[Union[str, bytes]],
+    batch_size: int = 500,
+    defer_fts: bool = False,
+    max_errors: int = 20,
+) -> dict:
+    """Imports NDJSON recipes (one JSON object per line) in a single transaction.
+
+    Lines are validated against Recipe and written with executemany in batches.
+    Invalid lines are skipped and reported. id and slug from the input are
+    ignored; created_at is kept when present, and must then be in SQLite's
+    ``YYYY-MM-DD HH:MM:SS`` form. With ``defer_fts`` the per-row FTS trigger
+    is dropped for the duration and the index is rebuilt once at the end,
+    which is much faster for large imports into small databases.
+    """
+    started = time.perf_counter()
+    imported = 0
+    errors: List[str] = []
+    failed = 0
+    batch: List[Tuple[Recipe, Optional[str]]] = []
+    with get_conn() as conn:
+        # Explicit BEGIN so the trigger DDL below is part of the transaction.
+        conn.execute("BEGIN IMMEDIATE")
+        suggest_tables = _suggest_tables(conn)
+        if defer_fts:
+            conn.execute("DROP TRIGGER IF EXISTS recipes_ai")
+            for table in suggest_tables:
+                conn.execute(f"DROP TRIGGER IF EXISTS {table}_ai")
+        for lineno, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+                if not isinstance(obj, dict):
+                    raise ValueError("kein JSON-Objekt")
+                created_at = _import_created_at(obj.pop("created_at", None))
+                batch.append((Recipe.model_validate(obj), created_at))
+            except ValueError as e:
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append(f"Zeile {lineno}: {e}")
+                continue
+            if len(batch) >= batch_size:
+                imported += len(_insert_many(conn, batch))
+                batch = []
+        if batch:
+            imported += len(_insert_many(conn, batch))
+        if defer_fts:
+            conn.execute(_fts_insert_trigger(_fts_decoded(conn)))
+            conn.execute("INSERT INTO recipes_fts(recipes_fts) VALUES('rebuild')")
+            for table in suggest_tables:
+                conn.execute(_suggest_insert_trigger(table))
+                conn.execute(f"INSERT INTO {table}({table}) VALUES('rebuild')")
+    seconds = time.perf_counter() - started
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(imported / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def export_recipes(chunk_size: int = 500) -> Iterator[str]:
+    """Yields every recipe as one NDJSON line (with id, slug and created_at).
+
+    Reads in keyset chunks so memory stays flat regardless of table size and no
+    cursor is held open between chunks.
+    """
+    last_id = 0
+    while True:
+        with get_conn(readonly=True) as conn:
+            rows = conn.execute(
+                "SELECT * FROM recipes WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size),
+            ).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            obj = _row_data(row)
+            obj["created_at"] = row["created_at"]
+            yield json.dumps(obj, ensure_ascii=False) + "\n"
+        last_id = rows[-1]["id"]
+
+
+@db_timed
+def reindex_recipes(chunk_size: int = 500) -> int:
+    """Rebuilds the derived lookup tables from the stored recipes (backfill)."""
+    n = 0
+    last_id = 0
+    with get_conn() as conn:
+        conn.execute("DELETE FROM recipe_ingredients")
+        conn.execute("DELETE FROM recipe_tags")
+        conn.execute("DELETE FROM recipe_minhash")
+        conn.execute("DELETE FROM recipe_lsh")
+        while True:
+            rows = conn.execute(
+                "SELECT * FROM recipes WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size),
+            ).fetchall()
+            if not rows:
+                break
+            _after_insert(conn, [(row["id"], _row_recipe(row)) for row in rows])
+            n += len(rows)
+            last_id = rows[-1]["id"]
+        conn.execute(
+            "INSERT OR REPLACE INTO app_meta (key, value) VALUES ('derived_version', ?)",
+            (str(_DERIVED_VERSION),),
+        )
+    return n
+
+
+@db_timed
+def convert_storage(fmt: str = RECIPE_STORAGE_FORMAT, chunk_size: int = 200) -> int:
+    """Rewrites stored recipes into storage format ``fmt``; returns how many changed.
+
+    Online: one short write transaction per chunk, so with WAL readers never
+    wait and other writers at most for one chunk. Rows already in the target
+    format are skipped, so an interrupted run simply continues. The full-text
+    index follows through the update trigger; the freed pages go back to the
+    file system with `recipes-app maintain`. Converting to compact or zlib
+    first switches the index to its decoding source (one rebuild); back to
+    json throughout, with json configured, it returns to the plain source.
+    """
+    target = STORAGE_FORMATS[fmt]
+    if target:
+        with get_conn() as conn:
+            _use_decoded_fts(conn)
+    n = 0
+    last_id = 0
+    while True:
+        with get_conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT * FROM recipes WHERE id > ? AND fmt != ? ORDER BY id LIMIT ?",
+                (last_id, target, chunk_size),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE recipes SET fmt=?, data=?, ingredients_text=?, steps_text=? WHERE id=?",
+                [
+                    (target, *_stored(_row_recipe(row), target), row["id"])
+                    for row in rows
+                ],
+            )
+        if not rows:
+            break
+        n += len(rows)
+        last_id = rows[-1]["id"]
+    if not target and not _STORAGE_FMT:
+        # Back to json throughout: plain FTS source, no app function needed.
+        with get_conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if _fts_decoded(conn) and not _has_compact_rows(conn):
+                _wire_fts(conn, False)
+    return n
+
+
+# Pages per step of incremental vacuum and backup; each step holds its lock
+# only briefly.
+_MAINTENANCE_STEP_PAGES = 256
+
+
+def _file_bytes(path: str) -> dict:
+    return {
+        name: os.path.getsize(path + suffix)
+        for name, suffix in (("db", ""), ("wal", "-wal"))
+        if os.path.exists(path + suffix)
+    }
+
+
+@db_timed
+def maintain(backup_path: Optional[str] = None, enable_incremental: bool = False) -> dict:
+    """FTS optimize, incremental vacuum and optionally an online backup.
+
+    Every part works in short transactions or, for the backup, in page steps
+    through SQLite's backup API; with WAL, readers keep running throughout.
+    ``enable_incremental`` switches a database created before auto_vacuum was
+    set to INCREMENTAL. That needs one full VACUUM, which rewrites the file
+    and makes writers wait until it is done.
+    """
+    report: dict = {"bytes_before": _file_bytes(DB_PATH)}
+    with get_conn() as conn:
+        optimized = []
+        for table in ["recipes_fts", *_suggest_tables(conn)]:
+            conn.execute(f"INSERT INTO {table}({table}) VALUES('optimize')")
+            conn.commit()
+            optimized.append(table)
+        report["fts_optimized"] = optimized
+        report["freelist_pages_before"] = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode != 2 and enable_incremental:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            mode = 2
+        elif mode == 2:
+            free = report["freelist_pages_before"]
+            while free:
+                conn.execute(f"PRAGMA incremental_vacuum({_MAINTENANCE_STEP_PAGES})").fetchall()
+                left = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if left >= free:
+                    break
+                free = left
+        report["auto_vacuum"] = {0: "none", 1: "full", 2: "incremental"}[mode]
+        report["freelist_pages_after"] = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # PASSIVE never waits for readers; what it can't copy back yet, the
+        # next automatic checkpoint does.
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+    report["bytes_after"] = _file_bytes(DB_PATH)
+    if backup_path:
+        started = time.perf_counter()
+        src = connect(DB_PATH, readonly=True)
+        dst = sqlite3.connect(backup_path)
+        try:
+            src.backup(dst, pages=_MAINTENANCE_STEP_PAGES)
+        finally:
+            dst.close()
+            src.close()
+        report["backup"] = {
+            "path": backup_path,
+            "bytes": os.path.getsize(backup_path),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+    return report
+
+
+# Candidates per LSH bucket. Bounds the work per lookup no matter how large
+# the table or how crowded a bucket (recipes sharing only common
+# ingredients) gets; recipes that share several bands still come through.
+_LSH_BUCKET_LIMIT = 64
+_LSH_CANDIDATES = 32
+_LSH_SQL = (
+    "SELECT recipe_id, COUNT(*) AS bands FROM ("
+    + " UNION ALL ".join(
+        [
+            "SELECT * FROM (SELECT recipe_id FROM recipe_lsh WHERE bucket = ? "
+            f"LIMIT {_LSH_BUCKET_LIMIT})"
+        ]
+        * similarity.BANDS
+    )
+    + f") GROUP BY recipe_id ORDER BY bands DESC LIMIT {_LSH_CANDIDATES}"
+)
+
+
+def _similar(
+    conn: sqlite3.Connection, sig: List[int], limit: int, min_score: float, exclude_id: Optional[int]
+) -> List[SimilarRecipe]:
+    candidates = [
+        row["recipe_id"]
+        for row in conn.execute(_LSH_SQL, similarity.band_keys(sig))
+        if row["recipe_id"] != exclude_id
+    ]
+    if not candidates:
+        return []
+    marks = ",".join("?" * len(candidates))
+    rows = conn.execute(
+        f"""SELECT m.recipe_id, m.sig, r.title FROM recipe_minhash m
+            JOIN recipes r ON r.id = m.recipe_id
+            WHERE m.recipe_id IN ({marks})""",
+        candidates,
+    ).fetchall()
+    scored = [
+        SimilarRecipe(
+            row["recipe_id"], row["title"], similarity.estimate(sig, similarity.unpack(row["sig"]))
+        )
+        for row in rows
+    ]
+    scored = [s for s in scored if s.score >= min_score]
+    scored.sort(key=lambda s: (-s.score, -s.id))
+    return scored[:limit]
+
+
+@db_timed
+def find_similar(r: Recipe, limit: int = 5, min_score: float = 0.0) -> List[SimilarRecipe]:
+    """Saved recipes resembling ``r`` (e.g. before saving it), best match first."""
+    sig = similarity.signature(similarity.features(r.title, ingredient_names(r.ingredients)))
+    if sig is None:
+        return []
+    with get_conn(readonly=True) as conn:
+        return _similar(conn, sig, limit, min_score, None)
+
+
+@db_timed
+def similar_recipes(recipe_id: int, limit: int = 5, min_score: float = 0.0) -> List[SimilarRecipe]:
+    """Recipes resembling a saved one, from its stored signature."""
+    with get_conn(readonly=True) as conn:
+        row = conn.execute(
+            "SELECT sig FROM recipe_minhash WHERE recipe_id = ?", (recipe_id,)
+        ).fetchone()
+        if row is None:
+            return []
+        return _similar(conn, similarity.unpack(row["sig"]), limit, min_score, recipe_id)
+
+
+@db_timed
+def find_by_pantry(
+    pantry: List[str],
+    limit: int = 20,
+    require_all: bool = False,
+    filters: Optional[RecipeFilters] = None,
+) -> List[PantryMatch]:
+    """Ranks saved recipes by how well they fit the given pantry.
+
+    Order: fewest missing ingredients first, then most pantry items used.
+    ``require_all`` keeps only recipes that use every pantry item; ``filters``
+    restricts the candidates by facet. Staples (salt, pepper, water) are
+    ignored on both sides.
+    """
+    names = ingredient_names(pantry)
+    if not names:
+        return []
+    marks = ",".join("?" * len(names))
+    clauses, filter_params = _filter_sql(filters)
+    # before the LIMIT, so a filtered-out best match doesn't hide the others
+    facets = (
+        f"AND recipe_id IN (SELECT r.id FROM recipes r WHERE {' AND '.join(clauses)})"
+        if clauses
+        else ""
+    )
+    having = "HAVING COUNT(*) = ?" if require_all else ""
+    params: list = (
+        list(names) + filter_params + ([len(names)] if require_all else []) + [limit]
+    )
+    with get_conn(readonly=True) as conn:
+        rows = conn.execute(
+            f"""SELECT r.id, r.title, r.time_minutes, r.difficulty, r.ingredient_load,
+                       m.matched, m.total - m.matched AS missing
+                FROM (SELECT recipe_id, COUNT(*) AS matched, total
+                      FROM recipe_ingredients WHERE name IN ({marks}) {facets}
+                      GROUP BY recipe_id {having}
+                      ORDER BY total - COUNT(*), COUNT(*) DESC, recipe_id DESC
+                      LIMIT ?) m
+                JOIN recipes r ON r.id = m.recipe_id
+                ORDER BY missing, m.matched DESC, r.id DESC""",
+            params,
+        ).fetchall()
+    return [
+        PantryMatch(
+            row["id"],
+            row["title"],
+            row["time_minutes"],
+            row["difficulty"],
+            row["ingredient_load"],
+            row["matched"],
+            row["missing"],
+        )
+        for row in rows
+    ]
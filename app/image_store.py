@@ -0,0 +1,61 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from . import metrics
+
+# Short-lived in-memory store for uploaded OCR photos. The result page links
+# to /ocr/image/{handle} instead of embedding the photo as a data URL, and the
+# handle is the content hash, so the same photo is only kept once.
+OCR_IMAGE_TTL_SECONDS = int(os.getenv("OCR_IMAGE_TTL_SECONDS", "900"))
+OCR_IMAGE_STORE_MAX_BYTES = int(os.getenv("OCR_IMAGE_STORE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+_lock = threading.Lock()
+# handle -> (expires_at, mime_type, data)
+_images: "OrderedDict[str, Tuple[float, str, bytes]]" = OrderedDict()
+_size = 0
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def put(data: bytes, mime_type: str) -> str:
+    global _size
+    handle = content_hash(data)[:32]
+    now = time.monotonic()
+    with _lock:
+        old = _images.pop(handle, None)
+        if old is not None:
+            _size -= len(old[2])
+        _images[handle] = (now + OCR_IMAGE_TTL_SECONDS, mime_type, data)
+        _size += len(data)
+        # Oldest first: expired entries, then whatever exceeds the byte budget.
+        while _images:
+            first = next(iter(_images))
+            expires_at, _, blob = _images[first]
+            if expires_at > now and _size <= OCR_IMAGE_STORE_MAX_BYTES:
+                break
+            if first == handle and len(_images) == 1:
+                break
+            del _images[first]
+            _size -= len(blob)
+    return handle
+
+
+def get(handle: str) -> Optional[Tuple[str, bytes]]:
+    with _lock:
+        entry = _images.get(handle)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return entry[1], entry[2]
+
+
+@metrics.collector
+def _metrics():
+    with _lock:
+        entries, size = len(_images), _size
+    yield "ocr_image_store_entries", "gauge", "Zwischengespeicherte OCR-Fotos", [({}, entries)]
+    yield "ocr_image_store_bytes", "gauge", "Speicherbedarf der OCR-Fotos", [({}, size)]
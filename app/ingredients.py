@@ -0,0 +1,77 @@
+import re
+from typing import Iterable, List, Optional
+
+# Normalization of free-text ingredient lines ("200 g Spaghetti", "2 rote
+# Zwiebeln, gewürfelt") to a bare ingredient name ("spaghetti", "zwiebel") for
+# the recipe_ingredients index. Pantry queries go through the same function,
+# so both sides meet on the same spelling.
+
+# Always assumed to be at hand; neither indexed nor counted as missing.
+STAPLES = frozenset({"salz", "pfeffer", "wasser"})
+
+_UNITS = {
+    "g", "gr", "gramm", "kg", "mg", "ml", "cl", "dl", "l", "liter",
+    "el", "tl", "msp", "prise", "prisen", "stück", "stk", "st",
+    "bund", "dose", "dosen", "packung", "packungen", "pck", "pkg", "päckchen",
+    "becher", "tasse", "tassen", "glas", "gläser", "zehe", "zehen",
+    "scheibe", "scheiben", "handvoll", "etwas", "ca", "cm", "zweig", "zweige",
+    "blatt", "blätter", "stange", "stangen", "kugel", "würfel", "schuss",
+}
+
+# Compound or irregular forms that should count as the same ingredient.
+_SYNONYMS = {
+    "knoblauchzehe": "knoblauch",
+    "eier": "ei",
+    "eigelb": "ei",
+    "eiweiß": "ei",
+    "lauchzwiebel": "frühlingszwiebel",
+    "möhre": "karotte",
+    "mohrrübe": "karotte",
+    "paprikaschote": "paprika",
+    "hähnchenbrustfilet": "hähnchenbrust",
+    "hühnerbrust": "hähnchenbrust",
+    "spaghetti": "nudel",
+    "penne": "nudel",
+    "pasta": "nudel",
+}
+
+_QUANTITY = re.compile(r"^[\d.,/½⅓⅔¼¾⅛\s\-–]+")
+_TRAILING = re.compile(r"\s+(?:zum|zur|nach|für|oder|je|und|à)\s.*$")
+
+
+def _singular(word: str) -> str:
+    # Cheap plural folding: Zwiebeln -> zwiebel, Tomaten -> tomate,
+    # Champignons -> champignon.
+    if len(word) >= 5 and word[-2:] in ("en", "ln", "rn", "ns", "ts", "ks"):
+        if not word.endswith("chen"):
+            return word[:-1]
+    return word
+
+
+def normalize_ingredient(text: str) -> Optional[str]:
+    """Returns the normalized ingredient name, or None for staples/empty lines."""
+    s = text.casefold()
+    s = re.sub(r"\([^)]*\)", " ", s)
+    s = s.split(",")[0].split(";")[0]
+    s = _TRAILING.sub("", s)
+    s = _QUANTITY.sub("", s.strip())
+    words = [w.strip(".:-–") for w in s.split()]
+    words = [w for w in words if w and w not in _UNITS and not w[0].isdigit()]
+    if not words:
+        return None
+    # The head noun comes last in German noun phrases ("frische Petersilie").
+    name = _singular(words[-1])
+    name = _SYNONYMS.get(name, name)
+    if name in STAPLES or len(name) < 2:
+        return None
+    return name
+
+
+def ingredient_names(lines: Iterable[str]) -> List[str]:
+    """Distinct normalized names of a recipe's ingredient lines, in input order."""
+    seen = {}
+    for line in lines:
+        name = normalize_ingredient(line)
+        if name:
+            seen.setdefault(name, None)
+    return list(seen)
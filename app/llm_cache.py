@@ -0,0 +1,146 @@
+import os
+import json
+import asyncio
+import time
+import hashlib
+import threading
+from typing import Any, Optional
+from . import db
+from . import metrics
+
+# Content-addressed cache for LLM responses, stored in its own SQLite file next
+# to recipes.db so it can be deleted or excluded from backups independently.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# last_used is only rewritten when older than this, so hot hits stay read-only.
+_TOUCH_INTERVAL = 60.0
+# Eviction runs every N writes instead of on every put.
+_EVICT_EVERY = 50
+
+_lock = threading.Lock()
+_ready: set = set()
+_puts = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def cache_path() -> str:
+    explicit = os.getenv("LLM_CACHE_PATH")
+    if explicit:
+        return explicit
+    return os.path.join(os.path.dirname(os.path.abspath(db.DB_PATH)), "llm_cache.db")
+
+
+def _ensure(path: str) -> None:
+    if path in _ready:
+        return
+    with db.get_conn(path=path) as conn:
+        conn.execute(f"PRAGMA journal_mode={db.SQLITE_JOURNAL_MODE}")
+        conn.execute("""CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )""")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used)"
+        )
+    _ready.add(path)
+
+
+def make_key(model: str, contents: Any, config: Any) -> str:
+    """Hash of everything that influences the model output."""
+    payload = json.dumps(
+        {"model": model, "contents": contents, "config": config},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key: str) -> Optional[str]:
+    if not LLM_CACHE_ENABLED:
+        return None
+    path = cache_path()
+    _ensure(path)
+    now = time.time()
+    with db.get_conn(readonly=True, path=path) as conn:
+        row = conn.execute(
+            "SELECT response, created_at, last_used FROM llm_cache WHERE key=?", (key,)
+        ).fetchone()
+    if row is None or now - row["created_at"] > LLM_CACHE_TTL_SECONDS:
+        with _lock:
+            _stats["misses"] += 1
+        return None
+    if now - row["last_used"] > _TOUCH_INTERVAL:
+        with db.get_conn(path=path) as conn:
+            conn.execute("UPDATE llm_cache SET last_used=? WHERE key=?", (now, key))
+    with _lock:
+        _stats["hits"] += 1
+    return row["response"]
+
+
+def put(key: str, model: str, response: str) -> None:
+    global _puts
+    if not LLM_CACHE_ENABLED:
+        return
+    path = cache_path()
+    _ensure(path)
+    now = time.time()
+    with db.get_conn(path=path) as conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_used)
+               VALUES (?, ?, ?, ?, ?)""",
+            (key, model, response, now, now),
+        )
+    with _lock:
+        _puts += 1
+        evict = _puts % _EVICT_EVERY == 1
+    if evict:
+        _evict(path, now)
+
+
+async def aget(key: str) -> Optional[str]:
+    """get() in a worker thread: the read and the last_used update stay off the event loop."""
+    return await asyncio.to_thread(get, key)
+
+
+async def aput(key: str, model: str, response: str) -> None:
+    """put() (including the periodic eviction) in a worker thread."""
+    await asyncio.to_thread(put, key, model, response)
+
+
+def _evict(path: str, now: float) -> None:
+    with db.get_conn(path=path) as conn:
+        removed = conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - LLM_CACHE_TTL_SECONDS,)
+        ).rowcount
+        removed += conn.execute(
+            """DELETE FROM llm_cache WHERE key IN (
+                   SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+               )""",
+            (LLM_CACHE_MAX_ENTRIES,),
+        ).rowcount
+    with _lock:
+        _stats["evictions"] += removed
+
+
+def stats() -> dict:
+    with _lock:
+        out = dict(_stats)
+    total = out["hits"] + out["misses"]
+    out["hit_ratio"] = out["hits"] / total if total else 0.0
+    return out
+
+
+@metrics.collector
+def _metrics():
+    s = stats()
+    yield "llm_cache_hits_total", "counter", "Treffer im LLM-Antwortcache", [({}, s["hits"])]
+    yield "llm_cache_misses_total", "counter", "Fehlschläge im LLM-Antwortcache", [({}, s["misses"])]
+    yield "llm_cache_evictions_total", "counter", "Verdrängte Cache-Einträge", [({}, s["evictions"])]
+    yield "llm_cache_hit_ratio", "gauge", "Trefferquote des LLM-Antwortcaches", [({}, s["hit_ratio"])]
@@ -1,36 +1,213 @@
 import os
 import json
-from .logger import get_logger
-from typing import List, Optional
+import time
+import logging
+import asyncio
+from contextlib import asynccontextmanager
+import functools
+from .logger import get_logger, log_payload
+from . import llm_cache
+from . import metrics
+from .partial_json import parse_partial_json
+from .image_store import content_hash
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 from .schemas import Recipe
-from google import genai
-from google.genai import types
-from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from google import genai
 
-load_dotenv()
 
 logger = get_logger("llm_client")
 
 LLM_BASE = os.getenv("LLM_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash")
+# Alternative Gemini endpoint, e.g. the local stand-in from bench/fake_llm.py.
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+# Upper bound for concurrent upstream calls on the async path. Keeps a burst of
+# /generate requests from occupying every worker the DB-only pages need.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+# Requests allowed to wait for a free slot. Beyond that they fail right away
+# with 503 + Retry-After instead of queueing for minutes behind a burst.
+LLM_QUEUE_MAX = int(os.getenv("LLM_QUEUE_MAX", "4"))
+LLM_RETRY_AFTER_SECONDS = int(os.getenv("LLM_RETRY_AFTER_SECONDS", "10"))
+
+
+class LLMError(RuntimeError):
+    """Fehler des Modells oder ungültige Antwort (HTTP 502)."""
+
+
+class LLMTimeoutError(LLMError):
+    """Das Modell hat nicht rechtzeitig geantwortet (HTTP 504)."""
+
+
+class LLMBusyError(LLMError):
+    """Warteschlange für Modellaufrufe voll (HTTP 503 mit Retry-After)."""
+
+    def __init__(self, retry_after: int = LLM_RETRY_AFTER_SECONDS):
+        super().__init__(
+            f"Gerade laufen zu viele Anfragen an das Modell. Bitte in {retry_after} s erneut versuchen."
+        )
+        self.retry_after = retry_after
+
+
+_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+_waiting = 0
+_active = 0
+
+
+@asynccontextmanager
+async def _slot(kind: str):
+    """Zulassung zum Upstream: freier Slot, Platz in der Warteschlange oder LLMBusyError."""
+    global _waiting, _active
+    if _semaphore.locked() and _waiting >= LLM_QUEUE_MAX:
+        metrics.LLM_REJECTED.inc(kind)
+        logger.warning("Warteschlange voll (%d wartend), %s abgelehnt", _waiting, kind)
+        raise LLMBusyError()
+    _waiting += 1
+    started = time.perf_counter()
+    try:
+        await _semaphore.acquire()
+    finally:
+        _waiting -= 1
+    metrics.LLM_QUEUE_WAIT.observe(time.perf_counter() - started, kind)
+    _active += 1
+    try:
+        yield
+    finally:
+        _active -= 1
+        _semaphore.release()
+
+
+# Identical requests in flight share one upstream call, keyed on the cache key
+# (normalized parameters) and ``fresh``. Waiters await the call shielded, so a
+# client that disconnects doesn't cancel it for the others, and its result
+# still ends up in the cache.
+_flights: Dict[Tuple[str, bool], asyncio.Task] = {}
+_stream_flights: Dict[Tuple[str, bool], "_StreamFlight"] = {}
+
+
+def _forget(registry: dict, flight_key, entry, task: asyncio.Task) -> None:
+    if registry.get(flight_key) is entry:
+        del registry[flight_key]
+    if not task.cancelled():
+        task.exception()  # retrieved here in case every waiter went away
+
+
+async def _single_flight(key: str, fresh: bool, kind: str, call: Callable[[], Awaitable[Any]]):
+    flight_key = (key, fresh)
+    task = _flights.get(flight_key)
+    if task is None:
+        task = asyncio.ensure_future(call())
+        _flights[flight_key] = task
+        task.add_done_callback(functools.partial(_forget, _flights, flight_key, task))
+        return await asyncio.shield(task)
+    metrics.LLM_COALESCED.inc(kind)
+    logger.info("%s: an laufenden Aufruf angehängt %s", kind, key[:12])
+    result = await asyncio.shield(task)
+    # Every caller gets its own Recipe; strings are immutable anyway.
+    return result.model_copy(deep=True) if isinstance(result, Recipe) else result
+
+
+class _StreamFlight:
+    """One upstream stream fanned out to all subscribers; late joiners replay the events so far."""
+
+    def __init__(self, events: AsyncIterator[Tuple[str, Any]]):
+        self.events: List[Tuple[str, Any]] = []
+        self.error: Optional[BaseException] = None
+        self.finished = False
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._run(events))
+
+    async def _run(self, events: AsyncIterator[Tuple[str, Any]]) -> None:
+        try:
+            async for event in events:
+                self.events.append(event)
+                self._notify()
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.finished = True
+            self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self) -> AsyncIterator[Tuple[str, Any]]:
+        i = 0
+        while True:
+            if i < len(self.events):
+                kind, payload = self.events[i]
+                i += 1
+                yield kind, payload.model_copy(deep=True) if isinstance(payload, Recipe) else payload
+            elif self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+
+@metrics.collector
+def _metrics():
+    yield "llm_queue_depth", "gauge", "Auf einen freien LLM-Slot wartende Anfragen", [({}, _waiting)]
+    yield "llm_calls_active", "gauge", "Laufende Upstream-Aufrufe", [({}, _active)]
+    yield "llm_flights", "gauge", "Laufende gemeinsame Aufrufe (Single-Flight)", [
+        ({"type": "call"}, len(_flights)),
+        ({"type": "stream"}, len(_stream_flights)),
+    ]
 
 # The client gets the API key from the environment variable `GEMINI_API_KEY`.
-_client: Optional[genai.Client] = None
+_client: Optional["genai.Client"] = None
+
+
+def _types():
+    """google.genai.types, erst beim ersten Modellaufruf importiert.
+
+    Das SDK samt Abhängigkeiten kostet beim Import rund eine halbe Sekunde und
+    etliche MB; Seiten, die nur die Datenbank lesen, brauchen es nie.
+    """
+    from google.genai import types
+
+    return types
 
 
-def _get_client() -> genai.Client:
+def _get_client() -> "genai.Client":
     global _client
     if _client is None:
         if not GOOGLE_API_KEY:
             raise RuntimeError(
                 "API-Key fehlt. Setze GOOGLE_API_KEY oder LLM_API_KEY oder GEMINI_API_KEY."
             )
-        _client = genai.Client(api_key=GOOGLE_API_KEY)
+        from google import genai
+
+        types = _types()
+        http_options = types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None
+        _client = genai.Client(api_key=GOOGLE_API_KEY, http_options=http_options)
     return _client
 
 
+def _observe(kind: str, model: str, seconds: float, resp=None, error: Optional[str] = None) -> None:
+    """Metriken und ein strukturierter Log-Eintrag (Dauer, Tokens) je Upstream-Aufruf."""
+    metrics.observe_llm(kind, model, seconds, resp, error)
+    usage = getattr(resp, "usage_metadata", None)
+    logger.log(
+        logging.WARNING if error else logging.INFO,
+        "LLM-Aufruf %s (%s)",
+        kind,
+        model,
+        extra={
+            "kind": kind,
+            "model": model,
+            "duration_ms": round(seconds * 1000, 1),
+            "error": error,
+            "tokens": getattr(usage, "total_token_count", None),
+        },
+    )
+
+
 def _prompt(
     mode: str,
     ingredients: Optional[List[str]],
@@ -65,82 +242,382 @@ Beispielstruktur:
 """
 
 
+def _recipe_config(temperature: float, min_tags: int) -> dict:
+    return {
+        "temperature": temperature,
+        "response_mime_type": "application/json",
+        "response_schema": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string"},
+                "servings": {"type": "integer"},
+                "time_minutes": {"type": "integer"},
+                "difficulty": {"type": "integer", "minimum": 1, "maximum": 3},
+                "ingredient_load": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 3,
+                },
+                "tags": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "minItems": min_tags,
+                },
+                "ingredients": {"type": "array", "items": {"type": "string"}},
+                "steps": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": [
+                "title",
+                "servings",
+                "time_minutes",
+                "difficulty",
+                "ingredient_load",
+                "tags",
+                "ingredients",
+                "steps",
+            ],
+        },
+    }
+
+
+def _normalize_ingredients(ingredients: Optional[List[str]]) -> List[str]:
+    # Order and duplicates don't change the request, so they must not change
+    # the cache key either.
+    seen = {" ".join(ing.split()).casefold() for ing in ingredients or []}
+    return [ing[:1].upper() + ing[1:] for ing in sorted(seen) if ing]
+
+
+def _generate_request(
+    mode: str,
+    ingredients: Optional[List[str]],
+    difficulty: int,
+    ingredient_load: int,
+    servings: int,
+):
+    if mode == "random":
+        ingredients = []
+    contents = [
+        {
+            "role": "user",
+            "parts": [
+                {
+                    "text": "Du bist ein präziser Rezeptgenerator. Antworte ausschließlich mit JSON."
+                },
+                {
+                    "text": _prompt(
+                        mode,
+                        _normalize_ingredients(ingredients),
+                        difficulty,
+                        ingredient_load,
+                        servings,
+                    )
+                },
+            ],
+        }
+    ]
+    return LLM_MODEL, contents, _recipe_config(0.7, 1)
+
+
+def _parse_request(raw_text: str):
+    # Collapse whitespace so resubmitting the same OCR text hits the cache.
+    text = "\n".join(" ".join(line.split()) for line in raw_text.strip().splitlines())
+    model = os.getenv("LLM_PARSE_MODEL", LLM_MODEL)
+    contents = [
+        {
+            "role": "user",
+            "parts": [
+                {
+                    "text": (
+                        "Du erhältst den aus einem Foto extrahierten Rezepttext. "
+                        "Strukturiere ihn in dieses JSON-Schema. Nutze exakt Deutsch. "
+                        "Wo Werte fehlen, schätze sinnvoll. Zutaten/Schritte möglichst nah am Text.\n\n"
+                    )
+                },
+                {"text": text},
+            ],
+        }
+    ]
+    return model, contents, _recipe_config(0.4, 0)
+
+
+def _recipe_call(
+    model: str, contents, config, label: str, fresh: bool = False, kind: str = "generate"
+) -> Recipe:
+    """Runs a JSON recipe request, answering from the response cache when possible.
+
+    Only responses that validate as Recipe are cached; ``fresh`` skips the
+    lookup but still stores the new answer.
+    """
+    key = llm_cache.make_key(model, contents, config)
+    if not fresh:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            logger.info("%s: Cache-Treffer %s", label, key[:12])
+            return Recipe(**json.loads(cached))
+    started = time.perf_counter()
+    try:
+        resp = _get_client().models.generate_content(
+            model=model, contents=contents, config=config
+        )
+    except Exception:
+        _observe(kind, model, time.perf_counter() - started, error="error")
+        raise
+    _observe(kind, model, time.perf_counter() - started, resp)
+    content = (getattr(resp, "text", None) or "").strip()
+    log_payload(logger, label, content)
+    if not content:
+        raise RuntimeError(f"Leere Antwort vom Modell ({label})")
+    recipe = Recipe(**json.loads(content))
+    llm_cache.put(key, model, content)
+    return recipe
+
+
+async def _acall(
+    model: str, contents, config=None, timeout: Optional[float] = None, kind: str = "generate"
+):
+    """Async upstream call with admission control and timeout; maps errors to LLMError."""
+    timeout = timeout or LLM_TIMEOUT_SECONDS
+    async with _slot(kind):
+        started = time.perf_counter()
+        try:
+            resp = await asyncio.wait_for(
+                _get_client().aio.models.generate_content(
+                    model=model, contents=contents, config=config
+                ),
+                timeout,
+            )
+            _observe(kind, model, time.perf_counter() - started, resp)
+            return resp
+        except asyncio.TimeoutError as e:
+            _observe(kind, model, time.perf_counter() - started, error="timeout")
+            raise LLMTimeoutError(
+                f"Das Modell hat nicht innerhalb von {timeout:.0f} s geantwortet."
+            ) from e
+        except LLMError:
+            raise
+        except Exception as e:
+            _observe(kind, model, time.perf_counter() - started, error="error")
+            raise LLMError(f"Fehler beim Aufruf des Modells: {e}") from e
+
+
+async def _arecipe_call(
+    model: str,
+    contents,
+    config,
+    label: str,
+    fresh: bool = False,
+    key_contents=None,
+    kind: str = "generate",
+    cache: bool = True,
+) -> Recipe:
+    # key_contents stands in for contents that can't be hashed cheaply (images).
+    # cache=False bypasses the response cache in both directions and doesn't
+    # join (or offer) an in-flight call: the result must be a recipe of its own.
+    key = llm_cache.make_key(model, key_contents or contents, config)
+    if cache and not fresh:
+        cached = await llm_cache.aget(key)
+        if cached is not None:
+            logger.info("%s: Cache-Treffer %s", label, key[:12])
+            return Recipe(**json.loads(cached))
+
+    async def call() -> Recipe:
+        resp = await _acall(model, contents, config, kind=kind)
+        content = (getattr(resp, "text", None) or "").strip()
+        log_payload(logger, label, content)
+        if not content:
+            metrics.LLM_ERRORS.inc(kind, model, "empty")
+            raise LLMError(f"Leere Antwort vom Modell ({label})")
+        try:
+            recipe = Recipe(**json.loads(content))
+        except ValueError as e:
+            metrics.LLM_ERRORS.inc(kind, model, "invalid")
+            raise LLMError(f"Ungültiges Rezept-JSON vom Modell: {e}") from e
+        if cache:
+            await llm_cache.aput(key, model, content)
+        return recipe
+
+    if not cache:
+        return await call()
+    return await _single_flight(key, fresh, kind, call)
+
+
 def generate_recipe(
     mode: str,
     ingredients: Optional[List[str]],
     difficulty: int,
     ingredient_load: int,
     servings: int,
+    fresh: bool = False,
 ) -> Recipe:
     if not GOOGLE_API_KEY:
         logger.error("LLM_API_KEY fehlt. Bitte in .env setzen.")
         raise RuntimeError("LLM_API_KEY fehlt. Bitte in .env setzen.")
     try:
         logger.info(
-            f"Request: mode={mode}, ingredients={ingredients}, difficulty={difficulty}, ingredient_load={ingredient_load}"
+            "Request: mode=%s, ingredients=%s, difficulty=%s, ingredient_load=%s",
+            mode,
+            ingredients,
+            difficulty,
+            ingredient_load,
         )
-        resp = _get_client().models.generate_content(
-            model=LLM_MODEL,
-            contents=[
-                {
-                    "role": "user",
-                    "parts": [
-                        {
-                            "text": "Du bist ein präziser Rezeptgenerator. Antworte ausschließlich mit JSON."
-                        },
-                        {
-                            "text": _prompt(
-                                mode, ingredients, difficulty, ingredient_load, servings
-                            )
-                        },
-                    ],
-                }
-            ],
-            config={
-                "temperature": 0.7,
-                "response_mime_type": "application/json",
-                "response_schema": {
-                    "type": "object",
-                    "properties": {
-                        "title": {"type": "string"},
-                        "servings": {"type": "integer"},
-                        "time_minutes": {"type": "integer"},
-                        "difficulty": {"type": "integer", "minimum": 1, "maximum": 3},
-                        "ingredient_load": {
-                            "type": "integer",
-                            "minimum": 1,
-                            "maximum": 3,
-                        },
-                        "tags": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "minItems": 1,
-                        },
-                        "ingredients": {"type": "array", "items": {"type": "string"}},
-                        "steps": {"type": "array", "items": {"type": "string"}},
-                    },
-                    "required": [
-                        "title",
-                        "servings",
-                        "time_minutes",
-                        "difficulty",
-                        "ingredient_load",
-                        "tags",
-                        "ingredients",
-                        "steps",
-                    ],
-                },
-            },
+        model, contents, config = _generate_request(
+            mode, ingredients, difficulty, ingredient_load, servings
         )
-        content = (getattr(resp, "text", None) or "").strip()
-        logger.info(f"LLM response: {content}")
-        obj = json.loads(content)
-        return Recipe(**obj)
+        return _recipe_call(model, contents, config, "LLM", fresh=fresh)
     except Exception as e:
-        logger.exception(f"LLM Fehler: {e}")
+        logger.exception("LLM Fehler: %s", e)
         raise
 
 
+async def agenerate_recipe(
+    mode: str,
+    ingredients: Optional[List[str]],
+    difficulty: int,
+    ingredient_load: int,
+    servings: int,
+    fresh: bool = False,
+    cache: bool = True,
+) -> Recipe:
+    """Async-Variante von generate_recipe; blockiert den Event-Loop nicht.
+
+    ``cache=False`` (Vorrat im Hintergrund) liest und schreibt den Antwort-Cache
+    nicht, damit /generate danach kein Duplikat des vorrätigen Rezepts liefert.
+    """
+    if not GOOGLE_API_KEY:
+        logger.error("LLM_API_KEY fehlt. Bitte in .env setzen.")
+        raise RuntimeError("LLM_API_KEY fehlt. Bitte in .env setzen.")
+    try:
+        logger.info(
+            "Request: mode=%s, ingredients=%s, difficulty=%s, ingredient_load=%s",
+            mode,
+            ingredients,
+            difficulty,
+            ingredient_load,
+        )
+        model, contents, config = _generate_request(
+            mode, ingredients, difficulty, ingredient_load, servings
+        )
+        return await _arecipe_call(model, contents, config, "LLM", fresh=fresh, cache=cache)
+    except Exception as e:
+        logger.exception("LLM Fehler: %s", e)
+        raise
+
+
+async def astream_recipe(
+    mode: str,
+    ingredients: Optional[List[str]],
+    difficulty: int,
+    ingredient_load: int,
+    servings: int,
+    fresh: bool = False,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streamt die Rezeptgenerierung: liefert ("partial", dict) sobald neue Teile
+    des JSON eingetroffen sind und zum Schluss ("done", Recipe) mit dem
+    validierten Rezept. Das Ergebnis landet im selben Cache wie generate_recipe.
+    Gleichzeitige identische Anfragen teilen sich einen Upstream-Stream.
+    """
+    if not GOOGLE_API_KEY:
+        logger.error("LLM_API_KEY fehlt. Bitte in .env setzen.")
+        raise RuntimeError("LLM_API_KEY fehlt. Bitte in .env setzen.")
+    model, contents, config = _generate_request(
+        mode, ingredients, difficulty, ingredient_load, servings
+    )
+    key = llm_cache.make_key(model, contents, config)
+    if not fresh:
+        cached = await llm_cache.aget(key)
+        if cached is not None:
+            logger.info("Stream: Cache-Treffer %s", key[:12])
+            yield "done", Recipe(**json.loads(cached))
+            return
+
+    logger.info(
+        "Stream-Request: mode=%s, ingredients=%s, difficulty=%s, ingredient_load=%s",
+        mode,
+        ingredients,
+        difficulty,
+        ingredient_load,
+    )
+    flight_key = (key, fresh)
+    flight = _stream_flights.get(flight_key)
+    if flight is None:
+        flight = _StreamFlight(_astream_upstream(model, contents, config, key))
+        _stream_flights[flight_key] = flight
+        flight.task.add_done_callback(functools.partial(_forget, _stream_flights, flight_key, flight))
+    else:
+        metrics.LLM_COALESCED.inc("generate")
+        logger.info("Stream: an laufenden Aufruf angehängt %s", key[:12])
+    async for event in flight.subscribe():
+        yield event
+
+
+async def _astream_upstream(model: str, contents, config, key: str) -> AsyncIterator[Tuple[str, Any]]:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + LLM_TIMEOUT_SECONDS
+    chunks: List[str] = []
+    last = None
+    usage_chunk = None
+    async with _slot("generate"):
+        started = time.perf_counter()
+        try:
+            stream = await asyncio.wait_for(
+                _get_client().aio.models.generate_content_stream(
+                    model=model, contents=contents, config=config
+                ),
+                LLM_TIMEOUT_SECONDS,
+            )
+            it = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        it.__anext__(), max(0.0, deadline - loop.time())
+                    )
+                except StopAsyncIteration:
+                    break
+                if getattr(chunk, "usage_metadata", None) is not None:
+                    usage_chunk = chunk
+                text = getattr(chunk, "text", None)
+                if not text:
+                    continue
+                chunks.append(text)
+                partial = parse_partial_json("".join(chunks))
+                if isinstance(partial, dict) and partial != last:
+                    last = partial
+                    yield "partial", partial
+        except asyncio.TimeoutError as e:
+            _observe("generate", model, time.perf_counter() - started, error="timeout")
+            raise LLMTimeoutError(
+                f"Das Modell hat nicht innerhalb von {LLM_TIMEOUT_SECONDS:.0f} s geantwortet."
+            ) from e
+        except LLMError:
+            raise
+        except Exception as e:
+            _observe("generate", model, time.perf_counter() - started, error="error")
+            logger.exception("Stream Fehler: %s", e)
+            raise LLMError(f"Fehler beim Aufruf des Modells: {e}") from e
+        _observe("generate", model, time.perf_counter() - started, usage_chunk)
+
+    content = "".join(chunks).strip()
+    log_payload(logger, "Stream", content)
+    try:
+        recipe = Recipe(**json.loads(content))
+    except ValueError as e:
+        metrics.LLM_ERRORS.inc("generate", model, "invalid")
+        raise LLMError(f"Ungültiges Rezept-JSON vom Modell: {e}") from e
+    await llm_cache.aput(key, model, content)
+    yield "done", recipe
+
+
+_OCR_INSTRUCTION = (
+    "Extrahiere den erkannten Text so wörtlich wie möglich. "
+    "Keine Erklärungen, nur der reine Textinhalt."
+)
+
+
+def _ocr_model() -> str:
+    return os.getenv("LLM_OCR_MODEL", "gemini-2.5-flash")
+
+
 def extract_text_from_image(image_bytes: bytes, mime_type: str = "image/jpeg") -> str:
     """
     Liest Text aus einem Bild (z. B. Foto eines Notizzettels) aus und gibt den
@@ -148,29 +625,111 @@ def extract_text_from_image(image_bytes: bytes, mime_type: str = "image/jpeg") -
     """
     try:
         client = _get_client()
-        model = os.getenv("LLM_OCR_MODEL", "gemini-2.5-flash")
-        resp = client.models.generate_content(
-            model=model,
-            contents=[
-                types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
-                (
-                    "Extrahiere den erkannten Text so wörtlich wie möglich. "
-                    "Keine Erklärungen, nur der reine Textinhalt."
-                ),
-            ],
-        )
+        model = _ocr_model()
+        started = time.perf_counter()
+        try:
+            resp = client.models.generate_content(
+                model=model,
+                contents=[
+                    _types().Part.from_bytes(data=image_bytes, mime_type=mime_type),
+                    _OCR_INSTRUCTION,
+                ],
+            )
+        except Exception:
+            _observe("ocr", model, time.perf_counter() - started, error="error")
+            raise
+        _observe("ocr", model, time.perf_counter() - started, resp)
         content = (getattr(resp, "text", None) or "").strip()
-        logger.info(f"OCR response: {content}")
+        log_payload(logger, "OCR", content)
         if not content:
-            logger.error(f"Leere OCR-Antwort: {resp}")
+            logger.error("Leere OCR-Antwort: %s", resp)
             raise RuntimeError("Keine OCR-Antwort vom Modell.")
         return content
     except Exception as e:
-        logger.exception(f"OCR Fehler: {e}")
+        logger.exception("OCR Fehler: %s", e)
+        raise
+
+
+async def aextract_text_from_image(
+    image_bytes: bytes, mime_type: str = "image/jpeg", fresh: bool = False
+) -> str:
+    """Async-Variante von extract_text_from_image; gleiche Fotos kommen aus dem Cache."""
+    try:
+        model = _ocr_model()
+        key = llm_cache.make_key(
+            model, [{"image_sha256": content_hash(image_bytes)}, _OCR_INSTRUCTION], None
+        )
+        if not fresh:
+            cached = await llm_cache.aget(key)
+            if cached is not None:
+                logger.info("OCR: Cache-Treffer %s", key[:12])
+                return cached
+
+        async def call() -> str:
+            resp = await _acall(
+                model,
+                [
+                    _types().Part.from_bytes(data=image_bytes, mime_type=mime_type),
+                    _OCR_INSTRUCTION,
+                ],
+                kind="ocr",
+            )
+            content = (getattr(resp, "text", None) or "").strip()
+            log_payload(logger, "OCR", content)
+            if not content:
+                metrics.LLM_ERRORS.inc("ocr", model, "empty")
+                logger.error("Leere OCR-Antwort: %s", resp)
+                raise LLMError("Keine OCR-Antwort vom Modell.")
+            await llm_cache.aput(key, model, content)
+            return content
+
+        return await _single_flight(key, fresh, "ocr", call)
+    except Exception as e:
+        logger.exception("OCR Fehler: %s", e)
         raise
 
 
-def parse_recipe_from_text(raw_text: str) -> Recipe:
+_IMAGE_RECIPE_INSTRUCTION = (
+    "Das Bild zeigt ein Rezept (z. B. Foto eines Notizzettels oder einer Kochbuchseite). "
+    "Lies es aus und strukturiere es in dieses JSON-Schema. Nutze exakt Deutsch. "
+    "Wo Werte fehlen, schätze sinnvoll. Zutaten/Schritte möglichst nah am Text."
+)
+
+
+async def aimage_to_recipe(
+    image_bytes: bytes, mime_type: str = "image/jpeg", fresh: bool = False
+) -> Recipe:
+    """
+    Wandelt ein Rezeptfoto in einem einzigen multimodalen Aufruf direkt in ein
+    Recipe um (statt OCR + Parsen). Gleiche Fotos werden per Inhalts-Hash aus
+    dem Cache bedient.
+    """
+    if not GOOGLE_API_KEY:
+        logger.error("LLM_API_KEY fehlt. Bitte in .env setzen.")
+        raise RuntimeError("LLM_API_KEY fehlt. Bitte in .env setzen.")
+    try:
+        logger.info("Foto direkt zu Rezept via LLM")
+        model = _ocr_model()
+        contents = [
+            _types().Part.from_bytes(data=image_bytes, mime_type=mime_type),
+            _IMAGE_RECIPE_INSTRUCTION,
+        ]
+        key_contents = [{"image_sha256": content_hash(image_bytes)}, _IMAGE_RECIPE_INSTRUCTION]
+        return await _arecipe_call(
+            model,
+            contents,
+            _recipe_config(0.4, 0),
+            "Foto-Rezept",
+            fresh=fresh,
+            key_contents=key_contents,
+            kind="ocr",
+        )
+    except Exception as e:
+        logger.exception("Foto-Rezept Fehler: %s", e)
+        raise
+
+
+def parse_recipe_from_text(raw_text: str, fresh: bool = False) -> Recipe:
     """
     Konvertiert freien OCR-Text eines (mutmaßlichen) Rezepts in unser Recipe-Schema
     mittels LLM. Falls Informationen fehlen, plausibel ergänzen. Ausgabe: reines JSON.
@@ -180,67 +739,22 @@ def parse_recipe_from_text(raw_text: str) -> Recipe:
         raise RuntimeError("LLM_API_KEY fehlt. Bitte in .env setzen.")
     try:
         logger.info("Parse OCR-Text zu Rezept via LLM")
-        client = _get_client()
-        model = os.getenv("LLM_PARSE_MODEL", LLM_MODEL)
-        resp = client.models.generate_content(
-            model=model,
-            contents=[
-                {
-                    "role": "user",
-                    "parts": [
-                        {
-                            "text": (
-                                "Du erhältst den aus einem Foto extrahierten Rezepttext. "
-                                "Strukturiere ihn in dieses JSON-Schema. Nutze exakt Deutsch. "
-                                "Wo Werte fehlen, schätze sinnvoll. Zutaten/Schritte möglichst nah am Text.\n\n"
-                            )
-                        },
-                        {"text": raw_text},
-                    ],
-                }
-            ],
-            config={
-                "temperature": 0.4,
-                "response_mime_type": "application/json",
-                "response_schema": {
-                    "type": "object",
-                    "properties": {
-                        "title": {"type": "string"},
-                        "servings": {"type": "integer"},
-                        "time_minutes": {"type": "integer"},
-                        "difficulty": {"type": "integer", "minimum": 1, "maximum": 3},
-                        "ingredient_load": {
-                            "type": "integer",
-                            "minimum": 1,
-                            "maximum": 3,
-                        },
-                        "tags": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "minItems": 0,
-                        },
-                        "ingredients": {"type": "array", "items": {"type": "string"}},
-                        "steps": {"type": "array", "items": {"type": "string"}},
-                    },
-                    "required": [
-                        "title",
-                        "servings",
-                        "time_minutes",
-                        "difficulty",
-                        "ingredient_load",
-                        "tags",
-                        "ingredients",
-                        "steps",
-                    ],
-                },
-            },
-        )
-        content = (getattr(resp, "text", None) or "").strip()
-        logger.info(f"Parse response: {content}")
-        if not content:
-            raise RuntimeError("Leere Antwort beim Parsen des OCR-Texts")
-        obj = json.loads(content)
-        return Recipe(**obj)
+        model, contents, config = _parse_request(raw_text)
+        return _recipe_call(model, contents, config, "Parse", fresh=fresh, kind="parse")
+    except Exception as e:
+        logger.exception("Parse-Fehler: %s", e)
+        raise
+
+
+async def aparse_recipe_from_text(raw_text: str, fresh: bool = False) -> Recipe:
+    """Async-Variante von parse_recipe_from_text."""
+    if not GOOGLE_API_KEY:
+        logger.error("LLM_API_KEY fehlt. Bitte in .env setzen.")
+        raise RuntimeError("LLM_API_KEY fehlt. Bitte in .env setzen.")
+    try:
+        logger.info("Parse OCR-Text zu Rezept via LLM")
+        model, contents, config = _parse_request(raw_text)
+        return await _arecipe_call(model, contents, config, "Parse", fresh=fresh, kind="parse")
     except Exception as e:
-        logger.exception(f"Parse-Fehler: {e}")
+        logger.exception("Parse-Fehler: %s", e)
         raise
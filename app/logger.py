@@ -1,15 +1,215 @@
 import os
+import copy
+import json
+import queue
+import atexit
+import random
 import logging
-from logging.handlers import RotatingFileHandler
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from . import metrics
+
+# File I/O and rotation happen on a background listener thread; the request
+# path only puts the record on a bounded queue. Records are written as one
+# JSON object per line with the request id of the HTTP request that caused them.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE = os.getenv("LOG_QUEUE", "1") != "0"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Raw LLM responses: at most this many characters, and only a sample of them
+# at INFO (LOG_LEVEL=DEBUG always logs them in full).
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "1000"))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.2"))
+# One record per HTTP request (method, route, status, duration_ms).
+LOG_ACCESS = os.getenv("LOG_ACCESS", "0") != "0"
+
+request_id: ContextVar[str] = ContextVar("request_id", default="")
+
+# Attributes every LogRecord has; everything else came in via ``extra``.
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_lock = threading.Lock()
+_handlers: dict = {}
+_listeners: list = []
+dropped = 0
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                out[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class _ContextFilter(logging.Filter):
+    """Stamps the request id in the logging thread, before the record crosses the queue."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rid = request_id.get()
+        if rid:
+            record.request_id = rid
+        return True
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """Never blocks the caller: when the listener falls behind, records are dropped and counted."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike the stock prepare, keep the record structured (extras, level)
+        # and only resolve what can't safely cross threads: args and exc_info.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        global dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped += 1
+
+
+class Payload:
+    """Lazily truncated text; only turned into a string if the record is emitted."""
+
+    __slots__ = ("text", "limit")
+
+    def __init__(self, text: str, limit: int = LOG_PAYLOAD_MAX_CHARS):
+        self.text, self.limit = text, limit
+
+    def __str__(self) -> str:
+        if len(self.text) <= self.limit:
+            return self.text
+        return f"{self.text[:self.limit]}… (+{len(self.text) - self.limit} Zeichen)"
+
+
+def log_payload(logger: logging.Logger, label: str, text: str) -> None:
+    """Logs a raw model response: in full at DEBUG, truncated and sampled at INFO."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s response: %s", label, text, extra={"payload_chars": len(text)})
+    elif logger.isEnabledFor(logging.INFO) and random.random() < LOG_PAYLOAD_SAMPLE_RATE:
+        logger.info("%s response: %s", label, Payload(text), extra={"payload_chars": len(text)})
+
+
+def new_request_id() -> str:
+    return secrets.token_hex(6)
+
+
+class RequestIdMiddleware:
+    """Binds a correlation id (incoming X-Request-ID or a new one) to everything logged for a request."""
+
+    def __init__(self, app):
+        self.app = app
+        self.access = get_logger("access") if LOG_ACCESS else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rid = ""
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                rid = value.decode("latin-1")[:64]
+                break
+        rid = rid or new_request_id()
+        token = request_id.set(rid)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", ()), (b"x-request-id", rid.encode("latin-1"))]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if self.access is not None:
+                route = scope.get("route")
+                self.access.info(
+                    "%s %s %s", scope["method"], scope["path"], status,
+                    extra={
+                        "route": route.path if route is not None else None,
+                        "status": status,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    },
+                )
+            request_id.reset(token)
+
+
+def _file_handler(path: str) -> logging.Handler:
+    handler = RotatingFileHandler(path, maxBytes=5 * 1024 * 1024, backupCount=2, encoding="utf-8")
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    return handler
+
+
+def _handler_for(path: str) -> logging.Handler:
+    """One handler per log file, shared by all loggers writing to it."""
+    with _lock:
+        handler = _handlers.get(path)
+        if handler is not None:
+            return handler
+        target = _file_handler(path)
+        if LOG_QUEUE:
+            handler = _DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+            listener = QueueListener(handler.queue, target, respect_handler_level=True)
+            listener.start()
+            _listeners.append(listener)
+        else:
+            handler = target
+        handler.addFilter(_ContextFilter())
+        _handlers[path] = handler
+        return handler
+
+
+def shutdown() -> None:
+    """Flushes the queue and stops the listener threads (also runs at exit)."""
+    with _lock:
+        listeners = list(_listeners)
+        _listeners.clear()
+    for listener in listeners:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(shutdown)
+
+
+@metrics.collector
+def _metrics():
+    depth = sum(h.queue.qsize() for h in _handlers.values() if isinstance(h, QueueHandler))
+    yield "log_queue_depth", "gauge", "Wartende Log-Einträge", [({}, depth)]
+    yield "log_records_dropped_total", "counter", "Verworfene Log-Einträge (Queue voll)", [({}, dropped)]
 
 
 def get_logger(name: str = "llm_client") -> logging.Logger:
     LOG_PATH = os.getenv("LLM_LOG_PATH", "llm_client.log")
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
     if not logger.hasHandlers():
-        handler = RotatingFileHandler(LOG_PATH, maxBytes=5 * 1024 * 1024, backupCount=2)
-        formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        logger.addHandler(_handler_for(LOG_PATH))
     return logger
@@ -1,27 +1,136 @@
 import os
-import base64
+import json
+import time
 import html
+from dataclasses import asdict
 from typing import List, Optional
+from urllib.parse import urlencode
 from fastapi import FastAPI, Request, Form, Query, File, UploadFile
-from fastapi.responses import RedirectResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import (
+    RedirectResponse,
+    HTMLResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.templating import Jinja2Templates
-from dotenv import load_dotenv
-from .db import init_db, save_recipe, get_recipe, search_recipes, delete_recipe
-from .schemas import Recipe
-from .llm_client import generate_recipe, extract_text_from_image, parse_recipe_from_text
+from .db import (
+    init_db,
+    close_all,
+    save_recipe,
+    save_recipes,
+    get_recipe,
+    recipe_json,
+    recipes_json,
+    list_recipe_summaries,
+    delete_recipe,
+    recipe_created_at,
+    import_recipes,
+    export_recipes,
+    find_by_pantry,
+    find_similar,
+    similar_recipes,
+    facet_counts,
+    normalize_tags,
+    suggest_titles,
+    TIME_BUCKETS,
+)
+from .schemas import PlanRequest, Recipe, RecipeFilters
+from . import recipe_pool
+from . import image_store
+from . import meal_plan
+from . import metrics
+from . import page_cache
+from . import similarity
+from .scaling import scale_recipe
+from . import startup
+from .assets import PrecompressedStaticFiles, static_url
+from .logger import RequestIdMiddleware
+from .llm_client import (
+    LLMBusyError,
+    LLMError,
+    LLMTimeoutError,
+    agenerate_recipe,
+    astream_recipe,
+    aextract_text_from_image,
+    aimage_to_recipe,
+    aparse_recipe_from_text,
+)
 
 
-load_dotenv()
-
 app = FastAPI(title="🍲 RasPi Rezept-App")
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.router.route_class = metrics.MetricsRoute
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
+app.mount("/static", PrecompressedStaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["static_url"] = static_url
 
 
 @app.on_event("startup")
-def _startup():
-    init_db()
+async def _startup():
+    # Everything before this hook (interpreter, imports, app setup) counts as import time.
+    imported = startup.process_seconds()
+    started = time.perf_counter()
+    migrations = init_db()
+    recipe_pool.start()
+    startup.report(imported, time.perf_counter() - started, migrations)
+
+
+@app.on_event("shutdown")
+async def _shutdown():
+    await recipe_pool.stop()
+    # Closing the last connection checkpoints the WAL back into recipes.db.
+    close_all()
+
+
+def _error_status(e: Exception) -> int:
+    """HTTP-Status für LLM-Fehler laut PRD: 504 Timeout, 502 Modellfehler, sonst 500.
+
+    503 (mit Retry-After), wenn die Warteschlange für Modellaufrufe voll ist.
+    """
+    if isinstance(e, LLMBusyError):
+        return 503
+    if isinstance(e, LLMTimeoutError):
+        return 504
+    if isinstance(e, LLMError):
+        return 502
+    return 500
+
+
+def _error_headers(e: Exception) -> Optional[dict]:
+    if isinstance(e, LLMBusyError):
+        return {"Retry-After": str(e.retry_after)}
+    return None
+
+
+def _mode_and_ingredients(ingredients: Optional[str]):
+    # Infer mode from ingredients: empty -> random, else ingredients
+    has_ingredients = bool(ingredients and ingredients.strip())
+    mode = "ingredients" if has_ingredients else "random"
+    ing_list: List[str] = []
+    if has_ingredients:
+        ing_list = [s.strip() for s in ingredients.split(",") if s.strip()]
+    return mode, ing_list
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _pantry_match_url(
+    ing_list: List[str], difficulty: int, ingredient_load: int, servings: int
+) -> Optional[str]:
+    """Gespeichertes Rezept mit allen Zutaten und gleichem Schwierigkeitsgrad/Zutatenumfang,
+    auf die gewünschten Portionen umgerechnet; sonst None."""
+    filters = RecipeFilters(difficulty=difficulty, ingredient_load=ingredient_load)
+    matches = await run_in_threadpool(find_by_pantry, ing_list, 1, True, filters)
+    if not matches:
+        return None
+    query = {"match": 1}
+    if 1 <= servings <= 20:  # Bereich von /recipe/{id}?servings
+        query["servings"] = servings
+    return f"/recipe/{matches[0].id}?" + urlencode(query)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -30,34 +139,164 @@ def index(request: Request):
 
 
 @app.post("/generate", response_class=HTMLResponse)
-def post_generate(
+async def post_generate(
     request: Request,
     difficulty: int = Form(...),
     ingredient_load: int = Form(...),
     servings: int = Form(...),
-    ingredients: Optional[str] = Form("")
+    ingredients: Optional[str] = Form(""),
+    fresh: bool = Form(False),
 ):
-    # Infer mode from ingredients: empty -> random, else ingredients
-    has_ingredients = bool(ingredients and ingredients.strip())
-    mode = "ingredients" if has_ingredients else "random"
-    ing_list: List[str] = []
-    if has_ingredients:
-        ing_list = [s.strip() for s in ingredients.split(",") if s.strip()]
+    mode, ing_list = _mode_and_ingredients(ingredients)
+    recipe_pool.note_activity()
+    if mode == "random" and not fresh:
+        stocked = await recipe_pool.take(difficulty, ingredient_load, servings)
+        if stocked is not None:
+            return templates.TemplateResponse(
+                "recipe.html", {"request": request, "recipe": stocked}
+            )
+    if mode == "ingredients" and not fresh:
+        # Erst in den gespeicherten Rezepten suchen, bevor das LLM bemüht wird
+        url = await _pantry_match_url(ing_list, difficulty, ingredient_load, servings)
+        if url:
+            return RedirectResponse(url=url, status_code=303)
     try:
-        recipe: Recipe = generate_recipe(
-            mode, ing_list, difficulty, ingredient_load, servings
+        recipe: Recipe = await agenerate_recipe(
+            mode, ing_list, difficulty, ingredient_load, servings, fresh=fresh
         )
     except Exception as e:
         return templates.TemplateResponse(
-            "index.html", {"request": request, "error": str(e)}
+            "index.html",
+            {"request": request, "error": str(e)},
+            status_code=_error_status(e),
+            headers=_error_headers(e),
         )
     return templates.TemplateResponse(
         "recipe.html", {"request": request, "recipe": recipe}
     )
 
 
+@app.get("/generate/stream")
+async def generate_stream(
+    difficulty: int = Query(...),
+    ingredient_load: int = Query(...),
+    servings: int = Query(...),
+    ingredients: Optional[str] = Query(""),
+    fresh: bool = Query(False),
+):
+    """Server-Sent Events: Teilergebnisse (partial) während der Generierung, dann done/error.
+
+    Passt ein gespeichertes Rezept zu den Zutaten, kommt stattdessen nur ``redirect``.
+    """
+    mode, ing_list = _mode_and_ingredients(ingredients)
+
+    async def events():
+        recipe_pool.note_activity()
+        try:
+            if mode == "random" and not fresh:
+                stocked = await recipe_pool.take(difficulty, ingredient_load, servings)
+                if stocked is not None:
+                    yield _sse("done", stocked.model_dump())
+                    return
+            if mode == "ingredients" and not fresh:
+                # wie POST /generate: passendes gespeichertes Rezept statt LLM
+                url = await _pantry_match_url(ing_list, difficulty, ingredient_load, servings)
+                if url:
+                    yield _sse("redirect", {"url": url})
+                    return
+            async for kind, payload in astream_recipe(
+                mode, ing_list, difficulty, ingredient_load, servings, fresh=fresh
+            ):
+                if kind == "done":
+                    payload = payload.model_dump()
+                yield _sse(kind, payload)
+        except Exception as e:
+            error = {"message": str(e), "status": _error_status(e)}
+            if isinstance(e, LLMBusyError):
+                error["retry_after"] = e.retry_after
+            yield _sse("error", error)
+        finally:
+            # a long stream counts as activity until its end
+            recipe_pool.note_activity()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/plan")
+async def api_plan(plan: PlanRequest):
+    """Mehrere Rezepte (oder ein Wochenplan) parallel generieren, als NDJSON gestreamt.
+
+    Eine Zeile je Rezept, sobald es fertig ist (``status`` ok/error), zum Schluss
+    eine Zusammenfassung. Mit ``save`` werden alle gelungenen Rezepte in einer
+    Transaktion gespeichert; fehlgeschlagene verhindern das nicht. Beinahe-Duplikate
+    (eines gespeicherten Rezepts oder eines früheren im Plan) werden nicht gespeichert,
+    sondern unter ``skipped`` gemeldet.
+    """
+    items = meal_plan.expand(plan)
+
+    def line(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False) + "\n"
+
+    async def results():
+        done = {}
+        async for index, recipe, error in meal_plan.run(items):
+            out = {"index": index, "label": items[index].label}
+            if error is None:
+                done[index] = recipe
+                yield line({**out, "status": "ok", "recipe": recipe.model_dump()})
+            else:
+                yield line({**out, "status": "error", "error": str(error), "code": _error_status(error)})
+        summary = {
+            "done": True, "ok": len(done), "failed": len(items) - len(done),
+            "saved_ids": [], "skipped": [],
+        }
+        if plan.save and done:
+            try:
+                keep, summary["skipped"] = await run_in_threadpool(meal_plan.split_duplicates, done)
+                if keep:
+                    ids = await run_in_threadpool(save_recipes, [keep[i] for i in sorted(keep)])
+                    summary["saved_ids"] = ids
+            except Exception as e:
+                summary["save_error"] = str(e)
+        yield line(summary)
+
+    return StreamingResponse(
+        results(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/preview", response_class=HTMLResponse)
+def preview_recipe(
+    request: Request,
+    recipe_json: str = Form(...),
+    servings: Optional[int] = Form(None, ge=1, le=20),
+):
+    """Zeigt ein (noch nicht gespeichertes) Rezept an, z. B. nach dem Streaming.
+
+    Mit ``servings`` werden die Mengen lokal umgerechnet; ``recipe_json`` bleibt
+    das Original, damit wiederholtes Umrechnen nicht Rundungsfehler aufsummiert.
+    """
+    try:
+        recipe = Recipe.model_validate_json(recipe_json)
+    except ValueError as e:
+        return templates.TemplateResponse(
+            "index.html", {"request": request, "error": str(e)}, status_code=400
+        )
+    ctx = {"request": request, "recipe": recipe}
+    if servings is not None and servings != recipe.servings:
+        ctx.update(recipe=scale_recipe(recipe, servings), scaled_from=recipe.servings, source_json=recipe_json)
+    return templates.TemplateResponse("recipe.html", ctx)
+
+
 @app.post("/save", response_class=RedirectResponse)
 def post_save(
+    request: Request,
     title: str = Form(...),
     servings: int = Form(...),
     time_minutes: int = Form(...),
@@ -66,6 +305,7 @@ def post_save(
     tags: str = Form(""),
     ingredients: str = Form(""),
     steps: str = Form(""),
+    force: bool = Form(False),
 ):
     r = Recipe(
         title=title.strip(),
@@ -77,34 +317,250 @@ def post_save(
         ingredients=[s.strip() for s in ingredients.split("\n") if s.strip()],
         steps=[s.strip() for s in steps.split("\n") if s.strip()],
     )
+    if not force:
+        # Mögliches Duplikat: nicht speichern, sondern nachfragen
+        duplicates = find_similar(r, limit=3, min_score=similarity.SIMILAR_DUPLICATE_THRESHOLD)
+        if duplicates:
+            return templates.TemplateResponse(
+                "recipe.html",
+                {"request": request, "recipe": r, "duplicates": duplicates},
+                status_code=409,
+            )
     rid = save_recipe(r)
     return RedirectResponse(url=f"/recipe/{rid}?saved=1", status_code=303)
 
 
 @app.get("/recipe/{recipe_id}", response_class=HTMLResponse)
-def view_recipe(request: Request, recipe_id: int):
-    r = get_recipe(recipe_id)
-    if not r:
-        return templates.TemplateResponse(
-            "notfound.html", {"request": request}, status_code=404
+def view_recipe(
+    request: Request,
+    recipe_id: int,
+    servings: Optional[int] = Query(None, ge=1, le=20),
+):
+    """Gespeicherte Rezepte ändern sich nie: 304 per ETag/Last-Modified, sonst HTML aus dem Seiten-Cache.
+
+    ``?servings=N`` rechnet die Zutatenmengen lokal auf N Portionen um (ohne
+    LLM); jede Portionszahl ist eine eigene Variante mit eigenem ETag.
+    """
+    base_url = str(request.base_url)
+    variant = servings or 0
+    page = page_cache.get(recipe_id, base_url, variant)
+    if page is None:
+        created_at = recipe_created_at(recipe_id)
+        r = None
+        if created_at is not None:
+            etag, last_modified = page_cache.validators(recipe_id, created_at, variant)
+            if page_cache.not_modified(request.headers, etag, last_modified):
+                return Response(status_code=304, headers=_validator_headers(etag, last_modified))
+            r = get_recipe(recipe_id)
+        if not r:
+            return templates.TemplateResponse(
+                "notfound.html", {"request": request}, status_code=404
+            )
+        ctx = {"request": request, "recipe": r}
+        if servings is not None and servings != r.servings:
+            ctx.update(recipe=scale_recipe(r, servings), scaled_from=r.servings)
+        body = templates.TemplateResponse("recipe.html", ctx).body
+        page_cache.put(recipe_id, base_url, etag, last_modified, body, variant)
+        return HTMLResponse(body, headers=_validator_headers(etag, last_modified))
+    etag, last_modified, body = page
+    headers = _validator_headers(etag, last_modified)
+    if page_cache.not_modified(request.headers, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(body, headers=headers)
+
+
+def _validator_headers(etag: str, last_modified: Optional[str]) -> dict:
+    # no-cache: Browser dürfen speichern, fragen aber jedes Mal per ETag nach
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def _saved_page(q: str, cursor: Optional[str], filters: RecipeFilters) -> dict:
+    """Trefferliste, nächste Seitenmarke und Facettenzähler in einem Durchgang."""
+    try:
+        items, next_cursor = list_recipe_summaries(
+            q=q or "", limit=50, cursor=cursor, filters=filters
         )
-    return templates.TemplateResponse("recipe.html", {"request": request, "recipe": r})
+    except ValueError:
+        # Kaputte oder veraltete Seitenmarke: wieder bei Seite 1 anfangen
+        items, next_cursor = list_recipe_summaries(q=q or "", limit=50, filters=filters)
+    facets = facet_counts(q=q or "", filters=filters)
+    return {"items": items, "next_cursor": next_cursor, "facets": facets}
+
+
+def _saved_url(q: str, filters: RecipeFilters, **changes) -> str:
+    """Link auf /saved mit geänderten Filtern; toggle_tag schaltet einen Tag um."""
+    params = {
+        "q": q,
+        "tag": list(filters.tags),
+        "max_time": filters.max_time,
+        "difficulty": filters.difficulty,
+        "ingredient_load": filters.ingredient_load,
+    }
+    toggle = changes.pop("toggle_tag", None)
+    if toggle is not None:
+        tags = params["tag"]
+        params["tag"] = [t for t in tags if t != toggle] if toggle in tags else tags + [toggle]
+    params.update(changes)
+    clean = {k: v for k, v in params.items() if v not in (None, "", [])}
+    return "/saved?" + urlencode(clean, doseq=True)
 
 
 @app.get("/saved", response_class=HTMLResponse)
-def saved(request: Request, q: str = Query("", description="FTS-Suchbegriff")):
-    items = search_recipes(q=q or "", limit=50)
+def saved(
+    request: Request,
+    q: str = Query("", description="FTS-Suchbegriff"),
+    cursor: Optional[str] = Query(None, description="Seitenmarke aus next_cursor"),
+    tag: List[str] = Query([], description="Tags (alle müssen passen)"),
+    max_time: Optional[int] = Query(None, ge=1),
+    difficulty: Optional[int] = Query(None, ge=1, le=3),
+    ingredient_load: Optional[int] = Query(None, ge=1, le=3),
+):
+    filters = RecipeFilters(tuple(normalize_tags(tag)), max_time, difficulty, ingredient_load)
+    page = _saved_page(q, cursor, filters)
     return templates.TemplateResponse(
-        "saved.html", {"request": request, "items": items, "q": q}
+        "saved.html",
+        {
+            "request": request,
+            "q": q,
+            "filters": filters,
+            "time_buckets": TIME_BUCKETS,
+            "saved_url": lambda **changes: _saved_url(q, filters, **changes),
+            **page,
+        },
     )
 
 
+@app.get("/api/saved")
+def api_saved(
+    q: str = Query(""),
+    cursor: Optional[str] = Query(None),
+    tag: List[str] = Query([]),
+    max_time: Optional[int] = Query(None, ge=1),
+    difficulty: Optional[int] = Query(None, ge=1, le=3),
+    ingredient_load: Optional[int] = Query(None, ge=1, le=3),
+):
+    """JSON-Variante von /saved: Treffer, next_cursor und Facettenzähler."""
+    filters = RecipeFilters(tuple(normalize_tags(tag)), max_time, difficulty, ingredient_load)
+    page = _saved_page(q, cursor, filters)
+    page["items"] = [asdict(item) for item in page["items"]]
+    return page
+
+
+# Versioned JSON read API for scripts and clients. Bodies are assembled from
+# the stored documents (db.recipe_json) instead of parsing and re-validating
+# every row; each item has the shape of Recipe.
+def _json(body: str) -> Response:
+    return Response(body.encode("utf-8"), media_type="application/json")
+
+
+@app.get("/api/v1/recipes")
+def api_recipes(
+    q: str = Query(""),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=100),
+    tag: List[str] = Query([]),
+    max_time: Optional[int] = Query(None, ge=1),
+    difficulty: Optional[int] = Query(None, ge=1, le=3),
+    ingredient_load: Optional[int] = Query(None, ge=1, le=3),
+):
+    """Vollständige Rezepte seitenweise (Suche und Filter wie /api/saved) plus next_cursor."""
+    filters = RecipeFilters(tuple(normalize_tags(tag)), max_time, difficulty, ingredient_load)
+    try:
+        items, next_cursor = list_recipe_summaries(q=q, limit=limit, cursor=cursor, filters=filters)
+    except ValueError:
+        return Response(status_code=400)
+    docs = recipes_json([item.id for item in items])
+    body = ", ".join(docs[item.id] for item in items if item.id in docs)
+    return _json(f'{{"items": [{body}], "next_cursor": {json.dumps(next_cursor)}}}')
+
+
+@app.get("/api/v1/recipes/batch")
+def api_recipes_batch(
+    ids: str = Query(..., pattern=r"^\d+(,\d+){0,99}$", description="Bis zu 100 IDs, kommasepariert"),
+):
+    """Mehrere Rezepte auf einmal, in der angefragten Reihenfolge; unbekannte IDs unter missing."""
+    wanted = list(dict.fromkeys(int(i) for i in ids.split(",")))
+    docs = recipes_json(wanted)
+    body = ", ".join(docs[i] for i in wanted if i in docs)
+    missing = [i for i in wanted if i not in docs]
+    return _json(f'{{"items": [{body}], "missing": {json.dumps(missing)}}}')
+
+
+@app.get("/api/v1/recipes/{recipe_id}")
+def api_recipe(recipe_id: int):
+    body = recipe_json(recipe_id)
+    if body is None:
+        return Response(status_code=404)
+    return _json(body)
+
+
 @app.post("/delete/{recipe_id}")
 def remove(recipe_id: int):
     delete_recipe(recipe_id)
     return RedirectResponse(url="/saved", status_code=303)
 
 
+@app.get("/api/suggest")
+def api_suggest(
+    q: str = Query("", max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+):
+    """Titelvorschläge für die Suche beim Tippen (Präfix- und Teilwortsuche)."""
+    return suggest_titles(q, limit=limit)
+
+
+@app.get("/api/similar/{recipe_id}")
+def api_similar(recipe_id: int, limit: int = Query(5, ge=1, le=20)):
+    """Ähnliche gespeicherte Rezepte (MinHash/LSH), ähnlichstes zuerst."""
+    return [
+        asdict(s)
+        for s in similar_recipes(recipe_id, limit=limit, min_score=similarity.SIMILAR_MIN_SCORE)
+    ]
+
+
+@app.get("/api/pantry")
+def api_pantry(
+    ingredients: str = Query(..., description="Vorhandene Zutaten, kommasepariert"),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Gespeicherte Rezepte nach Abdeckung der vorhandenen Zutaten (wenig fehlend zuerst)."""
+    pantry = [s.strip() for s in ingredients.split(",") if s.strip()]
+    return [
+        {
+            "id": m.id,
+            "title": m.title,
+            "time_minutes": m.time_minutes,
+            "difficulty": m.difficulty,
+            "ingredient_load": m.ingredient_load,
+            "matched": m.matched,
+            "missing": m.missing,
+        }
+        for m in find_by_pantry(pantry, limit=limit)
+    ]
+
+
+@app.get("/export.ndjson")
+def export_ndjson():
+    """Alle Rezepte als NDJSON (eine Zeile pro Rezept), gestreamt."""
+    return StreamingResponse(
+        export_recipes(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="recipes.ndjson"'},
+    )
+
+
+@app.post("/import")
+async def import_ndjson(
+    file: UploadFile = File(...),
+    defer_fts: bool = Query(False, description="FTS-Index am Ende neu aufbauen"),
+):
+    """Importiert NDJSON-Rezepte in einer Transaktion und liefert einen Bericht."""
+    return await run_in_threadpool(import_recipes, file.file, defer_fts=defer_fts)
+
+
 @app.get("/ocr", response_class=HTMLResponse)
 def ocr_form(request: Request):
     """Einfache Upload-Seite für OCR (separate Template-Datei)."""
@@ -118,10 +574,10 @@ async def post_ocr(request: Request, file: UploadFile = File(...)):
     try:
         data = await file.read()
         mime = (file.content_type or "image/jpeg")
-        text = extract_text_from_image(data, mime_type=mime)
-        # Bild als Data-URL für die Ergebnisanzeige durchreichen
-        b64 = base64.b64encode(data).decode("ascii")
-        img_url = f"data:{mime};base64,{b64}"
+        text = await aextract_text_from_image(data, mime_type=mime)
+        # Bild nur als kurzlebigen Link durchreichen statt als Data-URL
+        handle = image_store.put(data, mime)
+        img_url = str(request.url_for("ocr_image", handle=handle))
         return templates.TemplateResponse(
             "ocr_result.html", {"request": request, "raw_text": text, "image_url": img_url}
         )
@@ -129,8 +585,43 @@ async def post_ocr(request: Request, file: UploadFile = File(...)):
         return templates.TemplateResponse(
             "ocr_result.html",
             {"request": request, "raw_text": f"Fehler: {str(e)}"},
-            status_code=400,
+            status_code=_error_status(e) if isinstance(e, LLMError) else 400,
+            headers=_error_headers(e),
+        )
+
+
+# OCR: Bild in einem Schritt direkt als Rezept interpretieren (POST)
+@app.post("/ocr/recipe", response_class=HTMLResponse)
+async def post_ocr_recipe(request: Request, file: UploadFile = File(...)):
+    """Ein einziger multimodaler LLM-Aufruf: Foto -> Rezept."""
+    try:
+        data = await file.read()
+        mime = (file.content_type or "image/jpeg")
+        recipe: Recipe = await aimage_to_recipe(data, mime_type=mime)
+        return templates.TemplateResponse(
+            "recipe.html", {"request": request, "recipe": recipe}
         )
+    except Exception as e:
+        return templates.TemplateResponse(
+            "ocr_result.html",
+            {"request": request, "raw_text": "", "error": str(e)},
+            status_code=_error_status(e) if isinstance(e, LLMError) else 400,
+            headers=_error_headers(e),
+        )
+
+
+@app.get("/ocr/image/{handle}")
+def ocr_image(handle: str):
+    """Liefert ein kürzlich hochgeladenes OCR-Foto aus (kurzlebiger Link)."""
+    entry = image_store.get(handle)
+    if entry is None:
+        return Response(status_code=404)
+    mime, data = entry
+    return Response(
+        content=data,
+        media_type=mime,
+        headers={"Cache-Control": f"private, max-age={image_store.OCR_IMAGE_TTL_SECONDS}"},
+    )
 
 
 @app.get("/health")
@@ -138,11 +629,19 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus-Textformat: Routen-, LLM- und SQL-Latenzen, Cache-Trefferquoten."""
+    if not metrics.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # OCR: Freitext zu Rezept parsen (POST)
 @app.post("/ocr/parse", response_class=HTMLResponse, name="ocr_parse")
 async def ocr_parse(request: Request, raw_text: str = Form(...)):
     try:
-        recipe: Recipe = parse_recipe_from_text(raw_text)
+        recipe: Recipe = await aparse_recipe_from_text(raw_text)
         return templates.TemplateResponse(
             "recipe.html", {"request": request, "recipe": recipe}
         )
@@ -157,5 +656,6 @@ async def ocr_parse(request: Request, raw_text: str = Form(...)):
                 "image_url": (await request.form()).get("image_url"),
                 "error": str(e),
             },
-            status_code=400,
+            status_code=_error_status(e) if isinstance(e, LLMError) else 400,
+            headers=_error_headers(e),
         )
@@ -0,0 +1,134 @@
+import os
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from . import db
+from . import llm_client
+from . import recipe_pool
+from . import similarity
+from .ingredients import ingredient_names
+from .schemas import PlanItem, PlanRequest, Recipe
+
+# Batch generation for POST /api/plan. Items run concurrently, but never more
+# than PLAN_CONCURRENCY at once, so one plan can't fill the whole LLM admission
+# queue and push other users into 503s.
+PLAN_CONCURRENCY = int(os.getenv("PLAN_CONCURRENCY", "2"))
+# Per item, counted from when it gets a slot; waiting behind the plan's
+# other items doesn't count, so long plans don't time out their tail.
+PLAN_ITEM_TIMEOUT_SECONDS = float(os.getenv("PLAN_ITEM_TIMEOUT_SECONDS", "60"))
+
+# Week preset: one main ingredient per day so the seven recipes differ (random
+# mode with equal settings would hit the same cache entry seven times);
+# quick dishes on weekdays, more elaborate ones at the weekend. The items are
+# generated fresh, so the next week's plan isn't a replay from the cache.
+_WEEK = (
+    ("Montag", "Nudeln", 1, 1),
+    ("Dienstag", "Hähnchen", 1, 2),
+    ("Mittwoch", "Linsen", 1, 2),
+    ("Donnerstag", "Fisch", 2, 1),
+    ("Freitag", "Kartoffeln", 1, 2),
+    ("Samstag", "Rind", 2, 2),
+    ("Sonntag", "Gemüse", 3, 2),
+)
+
+Result = Tuple[int, Optional[Recipe], Optional[Exception]]
+
+
+def expand(plan: PlanRequest) -> List[PlanItem]:
+    """The preset's items (if any) followed by the explicit ones."""
+    items: List[PlanItem] = []
+    if plan.preset == "week":
+        items += [
+            PlanItem(
+                label=day,
+                ingredients=[main],
+                difficulty=difficulty,
+                ingredient_load=load,
+                servings=plan.servings,
+                fresh=True,
+            )
+            for day, main, difficulty, load in _WEEK
+        ]
+    return items + plan.items
+
+
+def split_duplicates(done: Dict[int, Recipe]) -> Tuple[Dict[int, Recipe], List[dict]]:
+    """Finished items worth saving, and the rest as near-duplicates.
+
+    An item is skipped if it resembles a saved recipe or an earlier item of
+    the same plan (SIMILAR_DUPLICATE_THRESHOLD, as for the save form).
+    """
+    keep: Dict[int, Recipe] = {}
+    skipped: List[dict] = []
+    kept_sigs: List[Tuple[int, List[int]]] = []
+    threshold = similarity.SIMILAR_DUPLICATE_THRESHOLD
+    for index in sorted(done):
+        recipe = done[index]
+        saved = db.find_similar(recipe, limit=1, min_score=threshold)
+        if saved:
+            skipped.append({"index": index, "duplicate_of": saved[0].id})
+            continue
+        sig = similarity.signature(similarity.features(recipe.title, ingredient_names(recipe.ingredients)))
+        earlier = next(
+            (i for i, other in kept_sigs if sig is not None and similarity.estimate(sig, other) >= threshold),
+            None,
+        )
+        if earlier is not None:
+            skipped.append({"index": index, "duplicate_of_index": earlier})
+            continue
+        keep[index] = recipe
+        if sig is not None:
+            kept_sigs.append((index, sig))
+    return keep, skipped
+
+
+async def _generate(item: PlanItem) -> Recipe:
+    if not item.ingredients:
+        if not item.fresh:
+            stocked = await recipe_pool.take(item.difficulty, item.ingredient_load, item.servings)
+            if stocked is not None:
+                return stocked
+        mode = "random"
+    else:
+        mode = "ingredients"
+    return await llm_client.agenerate_recipe(
+        mode,
+        item.ingredients,
+        item.difficulty,
+        item.ingredient_load,
+        item.servings,
+        fresh=item.fresh,
+    )
+
+
+async def run(
+    items: List[PlanItem],
+    concurrency: int = PLAN_CONCURRENCY,
+    timeout: float = PLAN_ITEM_TIMEOUT_SECONDS,
+) -> AsyncIterator[Result]:
+    """Yields (index, recipe, None) or (index, None, error) in order of completion.
+
+    A failed or timed-out item never affects the others. Leaving the loop
+    early (client gone) cancels what is still running; upstream calls that
+    were already under way finish in the background and land in the cache.
+    """
+    recipe_pool.note_activity()
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(index: int, item: PlanItem) -> Result:
+        async with slots:
+            try:
+                return index, await asyncio.wait_for(_generate(item), timeout), None
+            except asyncio.TimeoutError:
+                return index, None, llm_client.LLMTimeoutError(
+                    f"Kein Rezept innerhalb von {timeout:.0f} s."
+                )
+            except Exception as e:
+                return index, None, e
+
+    tasks = [asyncio.ensure_future(one(i, item)) for i, item in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
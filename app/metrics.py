@@ -0,0 +1,284 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from fastapi.routing import APIRoute
+
+# Minimal in-process metrics in the Prometheus text format (no client library,
+# nothing to install on the Pi). Recording is a dict lookup plus a few
+# increments under one lock; all formatting work happens at scrape time.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 6.0, 10.0, 20.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_metrics: List["_Metric"] = []
+# Callables returning [(name, type, help, [(labels, value), ...])] at scrape time.
+_collectors: List[Callable[[], Iterable[Tuple[str, str, str, list]]]] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        _metrics.append(self)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with _lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_label_str(self.labelnames, k)} {_num(v)}" for k, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float) -> None:
+        with _lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=HTTP_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (non-cumulative, last = +Inf), sum]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        with _lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._values.items())
+        lines = self.header()
+        for labels, (counts, total) in items:
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                le = _label_str(self.labelnames, labels, f'le="{_num(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {running}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, labels)} {running}")
+        return lines
+
+
+def collector(fn: Callable[[], Iterable[Tuple[str, str, str, list]]]):
+    """Registers a scrape-time callback for values another module already tracks."""
+    _collectors.append(fn)
+    return fn
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for fn in _collectors:
+        try:
+            families = list(fn())
+        except Exception:
+            continue
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                names = tuple(labels)
+                lines.append(f"{name}{_label_str(names, tuple(labels.values()))} {_num(value)}")
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP-Anfragen nach Route und Status", ("method", "route", "status")
+)
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds", "Antwortzeit je Route", ("method", "route"), HTTP_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Laufende Anfragen je Route", ("route",))
+
+LLM_DURATION = Histogram(
+    "llm_call_duration_seconds", "Dauer der Modellaufrufe", ("kind", "model"), LLM_BUCKETS
+)
+LLM_ERRORS = Counter(
+    "llm_call_errors_total", "Fehlgeschlagene Modellaufrufe", ("kind", "model", "reason")
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Verbrauchte Tokens laut usage_metadata", ("kind", "model", "type")
+)
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds", "Wartezeit auf einen freien LLM-Slot", ("kind",), HTTP_BUCKETS
+)
+LLM_REJECTED = Counter(
+    "llm_requests_rejected_total", "Wegen voller Warteschlange abgelehnte LLM-Anfragen (503)", ("kind",)
+)
+LLM_COALESCED = Counter(
+    "llm_requests_coalesced_total", "An einen laufenden identischen Aufruf angehängte Anfragen", ("kind",)
+)
+
+DB_DURATION = Histogram(
+    "db_query_duration_seconds", "Laufzeit der db.py-Funktionen", ("function",), DB_BUCKETS
+)
+
+# usage_metadata attribute -> label value
+_TOKEN_FIELDS = (
+    ("prompt_token_count", "prompt"),
+    ("candidates_token_count", "output"),
+    ("thoughts_token_count", "thoughts"),
+    ("cached_content_token_count", "cached"),
+)
+
+
+def observe_llm(kind: str, model: str, seconds: float, resp=None, error: Optional[str] = None) -> None:
+    """Records one upstream call; ``resp`` (or the last stream chunk) supplies token usage."""
+    if not METRICS_ENABLED:
+        return
+    LLM_DURATION.observe(seconds, kind, model)
+    if error is not None:
+        LLM_ERRORS.inc(kind, model, error)
+    usage = getattr(resp, "usage_metadata", None)
+    if usage is None:
+        return
+    for attr, label in _TOKEN_FIELDS:
+        count = getattr(usage, attr, None)
+        if count:
+            LLM_TOKENS.inc(kind, model, label, amount=count)
+
+
+def db_timed(fn):
+    """Decorator for db.py functions: records the call duration per function name."""
+    if not METRICS_ENABLED:
+        return fn
+    name = fn.__name__
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            DB_DURATION.observe(time.perf_counter() - started, name)
+
+    return wrapper
+
+
+_START_TIME = time.time()
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux only, else None)."""
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+    except (OSError, StopIteration):
+        return None
+
+
+@collector
+def _process():
+    yield "process_start_time_seconds", "gauge", "Startzeitpunkt des Prozesses", [({}, _START_TIME)]
+    rss = rss_bytes()
+    if rss is not None:
+        yield "process_resident_memory_bytes", "gauge", "Belegter Arbeitsspeicher (RSS)", [({}, rss)]
+
+
+def _route_label(scope, root_path: str) -> str:
+    """Path template of the handled route ("/recipe/{recipe_id}"), to keep labels bounded.
+
+    Routing has already written the matched route into the scope by the time the
+    response is done, so this costs nothing; mounts (static files) leave their
+    prefix in root_path instead.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return scope.get("root_path", "")[len(root_path):] or "unmatched"
+
+
+class MetricsRoute(APIRoute):
+    """Route class that tracks in-flight requests per path template, known only after routing."""
+
+    async def handle(self, scope, receive, send):
+        if not METRICS_ENABLED:
+            await super().handle(scope, receive, send)
+            return
+        HTTP_IN_FLIGHT.inc(self.path)
+        try:
+            await super().handle(scope, receive, send)
+        finally:
+            HTTP_IN_FLIGHT.dec(self.path)
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware (cheaper than BaseHTTPMiddleware): latency and status per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        root_path = scope.get("root_path", "")
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = _route_label(scope, root_path)
+            HTTP_DURATION.observe(time.perf_counter() - started, scope["method"], route)
+            HTTP_REQUESTS.inc(scope["method"], route, str(status))
@@ -0,0 +1,115 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional, Tuple
+from . import db
+from . import metrics
+
+# Rendered HTML of hot /recipe/{id} pages plus their HTTP validators. Saved
+# recipes never change, so an entry stays valid until the recipe is deleted;
+# db.on_change drops it. Keyed by (id, base_url, servings) because the page
+# contains absolute links built with url_for and can be rescaled (?servings=N;
+# 0 = as saved).
+RECIPE_PAGE_CACHE_ENTRIES = int(os.getenv("RECIPE_PAGE_CACHE_ENTRIES", "128"))
+
+_lock = threading.Lock()
+# (recipe_id, base_url, servings) -> (etag, last_modified, body)
+_pages: "OrderedDict[Tuple[int, str, int], Tuple[str, Optional[str], bytes]]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0}
+_salt: Optional[str] = None
+
+_TEMPLATES = ("app/templates/base.html", "app/templates/recipe.html", "app/static/dist/manifest.json")
+
+
+def _template_salt() -> str:
+    # Part of every ETag so a deploy with changed templates or assets
+    # invalidates the copies in browsers; identical across workers.
+    global _salt
+    if _salt is None:
+        digest = hashlib.sha1()
+        for path in _TEMPLATES:
+            try:
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+            except OSError:
+                pass
+        _salt = digest.hexdigest()[:8]
+    return _salt
+
+
+def validators(recipe_id: int, created_at: str, servings: int = 0) -> Tuple[str, Optional[str]]:
+    """ETag and Last-Modified header values for a recipe page (``servings``: rescaled variant)."""
+    variant = f"-p{servings}" if servings else ""
+    etag = f'W/"{recipe_id}{variant}-{created_at.replace(" ", "T")}-{_template_salt()}"'
+    try:
+        stamp = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return etag, None
+    return etag, format_datetime(stamp, usegmt=True)
+
+
+def not_modified(headers, etag: str, last_modified: Optional[str]) -> bool:
+    """Evaluates If-None-Match (preferred) or If-Modified-Since against the validators."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def get(recipe_id: int, base_url: str, servings: int = 0) -> Optional[Tuple[str, Optional[str], bytes]]:
+    key = (recipe_id, base_url, servings)
+    with _lock:
+        page = _pages.get(key)
+        if page is None:
+            _stats["misses"] += 1
+            return None
+        _pages.move_to_end(key)
+        _stats["hits"] += 1
+        return page
+
+
+def put(
+    recipe_id: int,
+    base_url: str,
+    etag: str,
+    last_modified: Optional[str],
+    body: bytes,
+    servings: int = 0,
+) -> None:
+    if RECIPE_PAGE_CACHE_ENTRIES <= 0:
+        return
+    key = (recipe_id, base_url, servings)
+    with _lock:
+        _pages[key] = (etag, last_modified, body)
+        _pages.move_to_end(key)
+        while len(_pages) > RECIPE_PAGE_CACHE_ENTRIES:
+            _pages.popitem(last=False)
+
+
+@db.on_change
+def invalidate(ids: List[int]) -> None:
+    wanted = set(ids)
+    with _lock:
+        for key in [k for k in _pages if k[0] in wanted]:
+            del _pages[key]
+
+
+@metrics.collector
+def _metrics():
+    with _lock:
+        hits, misses, entries = _stats["hits"], _stats["misses"], len(_pages)
+    total = hits + misses
+    yield "recipe_page_cache_hits_total", "counter", "Treffer im Seiten-Cache für Rezepte", [({}, hits)]
+    yield "recipe_page_cache_misses_total", "counter", "Fehlschläge im Seiten-Cache für Rezepte", [({}, misses)]
+    yield "recipe_page_cache_hit_ratio", "gauge", "Trefferquote des Seiten-Caches", [({}, hits / total if total else 0.0)]
+    yield "recipe_page_cache_entries", "gauge", "Gecachte Rezeptseiten", [({}, entries)]
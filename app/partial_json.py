@@ -0,0 +1,54 @@
+import json
+from typing import Any, Optional
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def parse_partial_json(text: str) -> Optional[Any]:
+    """Best-effort parse of a JSON document that is still being streamed.
+
+    Open strings, arrays and objects are closed so that everything received so
+    far becomes visible; an incomplete trailing key or value is dropped by
+    falling back to the last comma or opening bracket. Returns None if nothing
+    usable has arrived yet.
+    """
+    stack = []
+    in_string = False
+    escape = False
+    # (cut position, closers needed at that position)
+    safe_cut = None
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+            safe_cut = (i + 1, "".join(reversed(stack)))
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+        elif ch == "," and stack:
+            safe_cut = (i, "".join(reversed(stack)))
+
+    closers = "".join(reversed(stack))
+    candidates = []
+    if in_string:
+        body = text[:-1] if escape else text
+        candidates.append(body + '"' + closers)
+    else:
+        candidates.append(text.rstrip().rstrip(",:") + closers)
+    if safe_cut is not None:
+        candidates.append(text[: safe_cut[0]] + safe_cut[1])
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
@@ -0,0 +1,168 @@
+import os
+import time
+import asyncio
+import sqlite3
+from collections import deque
+from typing import Optional, Tuple
+from . import db
+from . import llm_client
+from . import metrics
+from .logger import get_logger
+from .schemas import Recipe
+
+# Background stock of pre-generated random-mode recipes, one queue per
+# (difficulty, ingredient_load, servings) bucket. Random mode has no user input
+# beyond those three values, so a recipe generated ahead of time is as good as
+# a live one and can be served without waiting on the model.
+RECIPE_POOL_SIZE = int(os.getenv("RECIPE_POOL_SIZE", "2"))
+# Default buckets: every difficulty/ingredient load for 2 servings. Format:
+# "difficulty:ingredient_load:servings,..." with "*" as wildcard.
+RECIPE_POOL_BUCKETS = os.getenv("RECIPE_POOL_BUCKETS", "*:*:2")
+# Cost budget: at most this many background generations per rolling hour.
+RECIPE_POOL_MAX_PER_HOUR = int(os.getenv("RECIPE_POOL_MAX_PER_HOUR", "12"))
+# Only refill when no user-triggered LLM request happened for this long.
+RECIPE_POOL_IDLE_SECONDS = float(os.getenv("RECIPE_POOL_IDLE_SECONDS", "20"))
+RECIPE_POOL_POLL_SECONDS = float(os.getenv("RECIPE_POOL_POLL_SECONDS", "10"))
+
+logger = get_logger("llm_client")
+
+Bucket = Tuple[int, int, int]
+
+_buckets: set = set()
+_recent: deque = deque()
+_last_activity = 0.0
+_wakeup: Optional[asyncio.Event] = None
+_task: Optional[asyncio.Task] = None
+
+
+# Portionen-Auswahl auf der Startseite
+_SERVINGS = (1, 2, 4, 6, 8)
+
+
+def _parse_buckets(spec: str) -> set:
+    out = set()
+    for part in spec.split(","):
+        fields = part.strip().split(":")
+        if len(fields) != 3:
+            continue
+        ranges = [
+            range(1, 4) if fields[0] == "*" else [int(fields[0])],
+            range(1, 4) if fields[1] == "*" else [int(fields[1])],
+            _SERVINGS if fields[2] == "*" else [int(fields[2])],
+        ]
+        out.update((d, l, s) for d in ranges[0] for l in ranges[1] for s in ranges[2])
+    return out
+
+
+def enabled() -> bool:
+    return RECIPE_POOL_SIZE > 0 and bool(llm_client.GOOGLE_API_KEY)
+
+
+def note_activity() -> None:
+    """Marks a user-triggered LLM request; the refill waits for the next idle phase."""
+    global _last_activity
+    _last_activity = time.monotonic()
+
+
+async def take(difficulty: int, ingredient_load: int, servings: int) -> Optional[Recipe]:
+    """Serves a stocked recipe for the bucket, or None (the bucket is then stocked too).
+
+    The SQLite delete runs in a worker thread; if the database is busy or
+    locked, the caller just generates live instead of failing the request.
+    """
+    if not enabled():
+        return None
+    bucket = (difficulty, ingredient_load, servings)
+    _buckets.add(bucket)
+    try:
+        data = await asyncio.to_thread(db.pool_take, *bucket)
+    except sqlite3.Error as e:
+        logger.warning("Pool: Vorrat nicht lesbar, generiere live: %s", e)
+        return None
+    if _wakeup is not None:
+        _wakeup.set()
+    if data is None:
+        return None
+    logger.info("Pool: Rezept aus Vorrat %s", bucket)
+    return Recipe.model_validate_json(data)
+
+
+def _budget_left() -> bool:
+    cutoff = time.monotonic() - 3600
+    while _recent and _recent[0] < cutoff:
+        _recent.popleft()
+    return len(_recent) < RECIPE_POOL_MAX_PER_HOUR
+
+
+async def _next_bucket() -> Optional[Bucket]:
+    counts = await asyncio.to_thread(db.pool_counts)
+    missing = [(counts.get(b, 0), b) for b in _buckets if counts.get(b, 0) < RECIPE_POOL_SIZE]
+    return min(missing)[1] if missing else None
+
+
+async def _refill_once() -> bool:
+    if time.monotonic() - _last_activity < RECIPE_POOL_IDLE_SECONDS:
+        return False
+    if not _budget_left():
+        return False
+    bucket = await _next_bucket()
+    if bucket is None:
+        return False
+    _recent.append(time.monotonic())
+    recipe = await llm_client.agenerate_recipe("random", [], *bucket, cache=False)
+    await asyncio.to_thread(db.pool_add, *bucket, recipe.model_dump_json(exclude={"id", "slug"}))
+    logger.info("Pool: Vorrat für %s aufgefüllt", bucket)
+    return True
+
+
+async def _run() -> None:
+    while True:
+        try:
+            if await _refill_once():
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Pool: Auffüllen fehlgeschlagen: %s", e)
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), RECIPE_POOL_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start() -> None:
+    global _task, _wakeup
+    if not enabled() or _task is not None:
+        return
+    _buckets.update(_parse_buckets(RECIPE_POOL_BUCKETS))
+    # Buckets stocked in a previous run stay stocked.
+    _buckets.update(db.pool_counts())
+    _wakeup = asyncio.Event()
+    _task = asyncio.get_running_loop().create_task(_run())
+
+
+async def stop() -> None:
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
+
+
+@metrics.collector
+def _metrics():
+    if not enabled():
+        return
+    counts = db.pool_counts()
+    yield "recipe_pool_recipes", "gauge", "Vorrätige Zufallsrezepte je Bucket", [
+        ({"bucket": "%d:%d:%d" % bucket}, counts.get(bucket, 0))
+        for bucket in sorted(_buckets | set(counts))
+    ]
+    yield "recipe_pool_generations_last_hour", "gauge", "Hintergrund-Generierungen der letzten Stunde", [
+        ({}, len(_recent))
+    ]
@@ -0,0 +1,210 @@
+import re
+from fractions import Fraction
+from typing import List, Optional, Tuple
+from .schemas import Recipe
+
+# Deterministic portion scaling for ingredient lines ("200 g Spaghetti",
+# "1 ½ EL Olivenöl", "2-3 Knoblauchzehen"). Only the leading quantity is
+# touched; lines without one ("Salz", "Petersilie zum Bestreuen") and the
+# step texts stay as they are. No model call, so a rescale costs microseconds.
+
+_GLYPHS = {
+    "½": Fraction(1, 2), "⅓": Fraction(1, 3), "⅔": Fraction(2, 3),
+    "¼": Fraction(1, 4), "¾": Fraction(3, 4), "⅛": Fraction(1, 8),
+}
+_G = "".join(_GLYPHS)
+# "1 ½", "1½", "1 1/2", "1/2", "1.000" (thousands), "1,5", "200", "½"
+_Q = rf"(?:\d+\s*[{_G}]|\d+\s+\d+/\d+|\d+/\d+|\d{{1,3}}(?:\.\d{{3}})+(?:,\d+)?(?![.\d])|\d+(?:[.,]\d+)?|[{_G}])"
+# German thousands grouping ("1.000 ml"), not a decimal point
+_GROUPED = re.compile(r"\d{1,3}(?:\.\d{3})+(?:,\d+)?$")
+_LINE = re.compile(
+    rf"^(?P<pre>\s*(?:ca\.?\s*|etwa\s+)?)(?P<low>{_Q})"
+    rf"(?:\s*(?:-|–|bis\s)\s*(?P<high>{_Q}))?"
+    r"(?P<sep>\s*)(?P<word>[^\W\d_]+\.?)?(?P<rest>.*)$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Metric units: kind and size in the kind's base unit (g, ml).
+_METRIC = {
+    "mg": ("mass", Fraction(1, 1000)), "g": ("mass", 1), "gr": ("mass", 1),
+    "gramm": ("mass", 1), "kg": ("mass", 1000),
+    "ml": ("volume", 1), "cl": ("volume", 10), "dl": ("volume", 100),
+    "l": ("volume", 1000), "liter": ("volume", 1000),
+}
+# Rounding steps for g/ml by magnitude; above the last limit 25.
+_METRIC_STEPS = ((20, 1), (100, 5), (500, 10))
+_SPOONS = {"el": 3, "tl": 1}  # in TL
+# Counted units, singular -> plural.
+_COUNTED = {
+    "prise": "Prisen", "stück": "Stück", "stk": "Stk", "bund": "Bund",
+    "dose": "Dosen", "packung": "Packungen", "päckchen": "Päckchen", "pck": "Pck",
+    "zehe": "Zehen", "scheibe": "Scheiben", "becher": "Becher", "tasse": "Tassen",
+    "handvoll": "Handvoll", "zweig": "Zweige", "stange": "Stangen", "msp": "Msp",
+    "glas": "Gläser", "würfel": "Würfel", "blatt": "Blätter", "kugel": "Kugeln",
+}
+_COUNTED_PLURAL = {plural.casefold(): singular for singular, plural in _COUNTED.items()}
+# Head nouns of unit-less counts that don't take the -e/-el -> -en/-eln plural.
+_NOUNS = {
+    "ei": "Eier", "apfel": "Äpfel", "avocado": "Avocados", "ananas": "Ananas",
+    "paprika": "Paprika", "zucchini": "Zucchini", "brötchen": "Brötchen",
+    "brühwürfel": "Brühwürfel", "lorbeerblatt": "Lorbeerblätter",
+}
+_NOUNS_PLURAL = {plural.casefold(): singular.capitalize() for singular, plural in _NOUNS.items()}
+
+
+def _number(text: str) -> Fraction:
+    text = text.strip()
+    if _GROUPED.match(text):
+        return Fraction(text.replace(".", "").replace(",", "."))
+    if text[-1] in _GLYPHS:
+        whole = text[:-1].strip()
+        return (int(whole) if whole else 0) + _GLYPHS[text[-1]]
+    if "/" in text:
+        whole, _, frac = text.rpartition(" ")
+        num, den = frac.split("/")
+        return (int(whole) if whole else 0) + Fraction(int(num), int(den))
+    return Fraction(text.replace(",", "."))
+
+
+def _unit(word: Optional[str]) -> Optional[str]:
+    """Canonical lowercase unit for the word after the quantity, or None."""
+    key = (word or "").rstrip(".").casefold()
+    if key in _METRIC or key in _SPOONS or key in _COUNTED:
+        return key
+    return _COUNTED_PLURAL.get(key)
+
+
+def parse_quantity(line: str) -> Optional[Tuple[Fraction, Optional[Fraction], Optional[str]]]:
+    """(low, high, unit) of the leading quantity, or None if the line has none."""
+    m = _LINE.match(line)
+    if m is None:
+        return None
+    try:
+        high = _number(m["high"]) if m["high"] else None
+        return _number(m["low"]), high, _unit(m["word"])
+    except ZeroDivisionError:  # "1/0"
+        return None
+
+
+def _round(value: Fraction, step: Fraction) -> Fraction:
+    # never round a quantity away entirely
+    return max(step, round(value / step) * step)
+
+
+def _decimal(value: Fraction) -> str:
+    return f"{float(value):.2f}".rstrip("0").rstrip(".").replace(".", ",")
+
+
+def _fraction(value: Fraction) -> str:
+    whole, rest = divmod(value, 1)
+    if rest == 0:
+        return str(int(whole))
+    glyph = next((g for g, f in _GLYPHS.items() if f == rest), None)
+    if glyph is None:
+        return _decimal(value)
+    return f"{int(whole)} {glyph}" if whole else glyph
+
+
+def _metric(values: List[Fraction], kind: str) -> Tuple[str, str]:
+    """Values in g/ml -> text and unit; kg/l from 1000 on, mg below 1 g."""
+    top = values[-1]
+    if top >= 1000:
+        unit = "kg" if kind == "mass" else "l"
+        return "–".join(_decimal(_round(v / 1000, Fraction(1, 20))) for v in values), unit
+    if kind == "mass" and top < 1:
+        unit, values = "mg", [v * 1000 for v in values]
+    else:
+        unit = "g" if kind == "mass" else "ml"
+    out = []
+    for v in values:
+        step = next((s for limit, s in _METRIC_STEPS if v < limit), 25)
+        out.append(_decimal(_round(v, Fraction(step))))
+    return "–".join(out), unit
+
+
+def _spoon(values: List[Fraction], unit: str) -> Tuple[str, str]:
+    """Values in TL -> text and unit; keeps the original spoon unless below 1 EL / from 2 EL on."""
+    top = values[-1]
+    if unit == "el" and top < 3 or unit == "tl" and top < 6:
+        return "–".join(_fraction(_round(v, Fraction(1, 4))) for v in values), "TL"
+    return "–".join(_fraction(_round(v / 3, Fraction(1, 2))) for v in values), "EL"
+
+
+def _count(value: Fraction) -> Fraction:
+    if value < 1:
+        return _round(value, Fraction(1, 4))
+    return _round(value, Fraction(1, 2) if value < 5 else Fraction(1))
+
+
+def _counted(unit: str, plural: bool, word: str) -> str:
+    out = _COUNTED[unit] if plural else unit.capitalize()
+    return out + "." if word.endswith(".") else out  # "Stk.", "Pck."
+
+
+def _noun(text: str, plural: bool) -> str:
+    """Number agreement of the head noun of a unit-less count ("1 Zwiebel" / "2 Zwiebeln")."""
+    words = text.split(" ")
+    for i, word in enumerate(words):
+        if not word[:1].isupper():
+            continue  # adjectives ("2 große Zwiebeln")
+        unit = _unit(word)
+        if unit is not None:
+            # a unit behind an adjective ("1 gehäufter EL Zucker"): only
+            # counted units inflect, the ingredient after it never does
+            if unit in _COUNTED:
+                words[i] = _counted(unit, plural, word)
+            break
+        key = word.casefold()
+        if plural:
+            if key in _NOUNS:
+                words[i] = _NOUNS[key]
+            elif key.endswith(("e", "el")) and key not in _NOUNS_PLURAL:
+                words[i] = word + "n"
+        elif key in _NOUNS_PLURAL:
+            words[i] = _NOUNS_PLURAL[key]
+        elif key.endswith(("en", "eln")) and key not in _NOUNS:
+            words[i] = word[:-1]
+        break
+    return " ".join(words)
+
+
+def scale_ingredient(line: str, factor: Fraction) -> str:
+    """Scales the leading quantity of one ingredient line by ``factor``."""
+    m = _LINE.match(line)
+    if m is None or factor == 1:
+        return line
+    unit = _unit(m["word"])
+    try:
+        values = [_number(m["low"]) * factor]
+        if m["high"]:
+            values.append(_number(m["high"]) * factor)
+    except ZeroDivisionError:  # "1/0 TL": leave the line as it is
+        return line
+    if unit in _METRIC:
+        kind, size = _METRIC[unit]
+        text, word = _metric([v * size for v in values], kind)
+        return f"{m['pre']}{text}{m['sep']}{word}{m['rest']}"
+    if unit in _SPOONS:
+        text, word = _spoon([v * _SPOONS[unit] for v in values], unit)
+        return f"{m['pre']}{text}{m['sep']}{word}{m['rest']}"
+    numbers = [_count(v) for v in values]
+    if unit == "prise":
+        numbers = [max(Fraction(1), Fraction(round(v))) for v in numbers]
+    text = "–".join(_fraction(n) for n in numbers)
+    plural = numbers[-1] > 1
+    if unit is not None:
+        return f"{m['pre']}{text}{m['sep']}{_counted(unit, plural, m['word'])}{m['rest']}"
+    return f"{m['pre']}{text}{m['sep']}{_noun((m['word'] or '') + m['rest'], plural)}"
+
+
+def scale_recipe(recipe: Recipe, servings: int) -> Recipe:
+    """Copy of ``recipe`` with the ingredient quantities for ``servings`` portions."""
+    if servings == recipe.servings:
+        return recipe
+    factor = Fraction(servings, recipe.servings)
+    return recipe.model_copy(
+        update={
+            "servings": servings,
+            "ingredients": [scale_ingredient(line, factor) for line in recipe.ingredients],
+        }
+    )
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from dataclasses import dataclass
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Literal, Optional, Tuple
 
 
 class Recipe(BaseModel):
@@ -19,3 +20,77 @@ class Recipe(BaseModel):
     @field_validator("ingredients", "steps")
     def strip_items(cls, v):
         return [s.strip() for s in v if s.strip()]
+
+
+class PlanItem(BaseModel):
+    """One recipe of a batch plan; without ingredients it is generated in random mode."""
+
+    label: Optional[str] = Field(None, max_length=40, description="z. B. Wochentag")
+    ingredients: List[str] = Field(default_factory=list, max_length=20)
+    difficulty: int = Field(ge=1, le=3, default=1)
+    ingredient_load: int = Field(ge=1, le=3, default=2)
+    servings: int = Field(ge=1, le=20, default=2)
+    fresh: bool = False
+
+    @field_validator("ingredients")
+    def strip_items(cls, v):
+        return [s.strip() for s in v if s.strip()]
+
+
+class PlanRequest(BaseModel):
+    """Body of POST /api/plan: explicit items and/or a preset ("week": seven dinners)."""
+
+    items: List[PlanItem] = Field(default_factory=list, max_length=14)
+    preset: Optional[Literal["week"]] = None
+    servings: int = Field(ge=1, le=20, default=2, description="Portionen für das Preset")
+    save: bool = True
+
+    @model_validator(mode="after")
+    def not_empty(self):
+        if not self.items and self.preset is None:
+            raise ValueError("items oder preset angeben")
+        return self
+
+
+@dataclass(slots=True, frozen=True)
+class RecipeSummary:
+    """Compact list row for /saved; built straight from DB columns without validation."""
+
+    id: int
+    title: str
+    time_minutes: int
+    difficulty: int
+    ingredient_load: int
+    created_at: str
+
+
+@dataclass(slots=True, frozen=True)
+class RecipeFilters:
+    """Facet filters for /saved; all set facets must match (tags: every tag)."""
+
+    tags: Tuple[str, ...] = ()
+    max_time: Optional[int] = None
+    difficulty: Optional[int] = None
+    ingredient_load: Optional[int] = None
+
+
+@dataclass(slots=True, frozen=True)
+class PantryMatch:
+    """Saved recipe ranked by pantry coverage: matched pantry items vs. missing ingredients."""
+
+    id: int
+    title: str
+    time_minutes: int
+    difficulty: int
+    ingredient_load: int
+    matched: int
+    missing: int
+
+
+@dataclass(slots=True, frozen=True)
+class SimilarRecipe:
+    """Saved recipe with the estimated Jaccard similarity (MinHash) to another recipe."""
+
+    id: int
+    title: str
+    score: float
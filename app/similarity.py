@@ -0,0 +1,89 @@
+import os
+import re
+import struct
+import hashlib
+from operator import eq
+from typing import Iterable, List, Optional
+
+# MinHash signatures over a recipe's normalized ingredient names and title
+# shingles, plus LSH band keys for candidate lookup. Two recipes agree on a
+# signature position with probability equal to the Jaccard similarity of
+# their feature sets; they share at least one band (and so show up as
+# candidates of each other) with probability 1 - (1 - J**ROWS)**BANDS, which
+# is ~0.78 at J=0.3 and ~1.0 from J=0.6 on.
+
+# Estimated similarity from which saving asks for confirmation, and the floor
+# for the "similar recipes" list on /recipe/{id}.
+SIMILAR_DUPLICATE_THRESHOLD = float(os.getenv("SIMILAR_DUPLICATE_THRESHOLD", "0.6"))
+SIMILAR_MIN_SCORE = float(os.getenv("SIMILAR_MIN_SCORE", "0.25"))
+
+NUM_PERM = 32
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Each signature position uses its own hash function: 32-bit slices of keyed
+# BLAKE2b digests (16 per 64-byte digest). Fixed keys, since signatures are
+# stored and must stay comparable across versions.
+_BLOCK = struct.Struct("<16I")
+_HASHERS = [
+    hashlib.blake2b(digest_size=64, key=b"recipe-minhash-%d" % i) for i in range(NUM_PERM // 16)
+]
+_PACK = struct.Struct(f"<{NUM_PERM}I")
+
+_NON_LETTERS = re.compile(r"[^\w]+|\d+|_")
+
+
+def title_shingles(title: str, size: int = 3) -> List[str]:
+    """Character shingles of the casefolded title; catch compounds ("Kartoffelsuppe" ~ "Suppe")."""
+    text = " ".join(_NON_LETTERS.sub(" ", title.casefold()).split())
+    if len(text) <= size:
+        return [text] if text else []
+    return [text[i:i + size] for i in range(len(text) - size + 1)]
+
+
+def features(title: str, ingredient_names: Iterable[str]) -> List[str]:
+    """Feature set of a recipe; ingredient names and title shingles in separate namespaces."""
+    out = {"i:" + name for name in ingredient_names}
+    out.update("t:" + s for s in title_shingles(title))
+    return sorted(out)
+
+
+def _hashes(feature: str) -> tuple:
+    data = feature.encode("utf-8")
+    out: tuple = ()
+    for hasher in _HASHERS:
+        h = hasher.copy()  # cheaper than keying a new one
+        h.update(data)
+        out += _BLOCK.unpack(h.digest())
+    return out
+
+
+def signature(feats: Iterable[str]) -> Optional[List[int]]:
+    """MinHash signature (NUM_PERM 32-bit values), or None for an empty feature set."""
+    rows = [_hashes(f) for f in feats]
+    if not rows:
+        return None
+    return list(map(min, zip(*rows)))
+
+
+def band_keys(sig: List[int]) -> List[int]:
+    """One signed 64-bit bucket key per band (band index included, so bands never collide)."""
+    keys = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<B{ROWS}I", band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def pack(sig: List[int]) -> bytes:
+    return _PACK.pack(*sig)
+
+
+def unpack(blob: bytes) -> List[int]:
+    return list(_PACK.unpack(blob))
+
+
+def estimate(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(map(eq, a, b)) / NUM_PERM
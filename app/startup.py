@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import time
+import statistics
+import subprocess
+from typing import List, Optional
+from . import metrics
+from .logger import get_logger
+
+# Cold-start and idle-memory budget for the Pi. systemd restarts the service
+# (Restart=always), so every crash is a cold start, and the app shares the
+# board's RAM with everything else. `recipes-app startup-check` starts fresh
+# processes and fails when either budget is exceeded.
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "6"))
+IDLE_RSS_BUDGET_MB = float(os.getenv("IDLE_RSS_BUDGET_MB", "80"))
+
+# Modules that must not be loaded before the first request needs them.
+LAZY_MODULES = ("google.genai",)
+
+_STARTED = time.perf_counter()
+_report: dict = {}
+
+logger = get_logger("startup")
+
+
+def process_seconds() -> float:
+    """Seconds since the process started (Linux), else since this module was imported."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 is the start time in clock ticks after boot; the command
+            # name in field 2 may contain spaces, so count from its ")".
+            start_ticks = int(f.read().rpartition(")")[2].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - _STARTED
+
+
+def report(import_seconds: float, init_seconds: float, migrations: int) -> dict:
+    """Logs how long the start took and how much memory the idle app holds."""
+    rss = metrics.rss_bytes()
+    _report.update(
+        import_seconds=round(import_seconds, 3),
+        init_db_seconds=round(init_seconds, 3),
+        ready_seconds=round(process_seconds(), 3),
+        migrations=migrations,
+        rss_mb=round(rss / (1024 * 1024), 1) if rss is not None else None,
+        lazy_loaded=[m for m in LAZY_MODULES if m in sys.modules],
+    )
+    logger.info(
+        "Start: bereit nach %.2f s (Import %.2f s, init_db %.0f ms, %d Migration(en)), RSS %s MB",
+        _report["ready_seconds"],
+        import_seconds,
+        init_seconds * 1000,
+        migrations,
+        _report["rss_mb"],
+        extra=dict(_report),
+    )
+    return dict(_report)
+
+
+@metrics.collector
+def _metrics():
+    if not _report:
+        return
+    yield "app_startup_seconds", "gauge", "Dauer des letzten Starts je Phase", [
+        ({"phase": "import"}, _report["import_seconds"]),
+        ({"phase": "init_db"}, _report["init_db_seconds"]),
+        ({"phase": "ready"}, _report["ready_seconds"]),
+    ]
+    if _report["rss_mb"] is not None:
+        yield "app_startup_resident_memory_bytes", "gauge", "RSS direkt nach dem Start", [
+            ({}, int(_report["rss_mb"] * 1024 * 1024))
+        ]
+
+
+# Runs in a fresh interpreter: full app import plus startup hooks, then prints
+# the report with the idle RSS after a garbage collection.
+_PROBE = """
+import gc, json, asyncio
+from app import main, metrics, startup
+
+async def probe():
+    await main.app.router.startup()
+    gc.collect()
+    rss = metrics.rss_bytes()
+    out = dict(startup._report, idle_rss_mb=round(rss / 1048576, 1) if rss else None)
+    print(json.dumps(out), flush=True)
+    await main.app.router.shutdown()
+
+asyncio.run(probe())
+"""
+
+
+def probe(db_path: Optional[str] = None) -> dict:
+    """Starts the app once in a new process; adds the wall time until it was ready."""
+    env = dict(os.environ, RECIPE_POOL_SIZE="0")
+    if db_path:
+        env["DB_PATH"] = db_path
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", _PROBE], env=env, stdout=subprocess.PIPE, text=True
+    )
+    line = proc.stdout.readline()
+    cold_start = time.perf_counter() - started
+    proc.communicate()
+    if proc.returncode != 0 or not line:
+        raise RuntimeError(f"Start fehlgeschlagen (Exit-Code {proc.returncode})")
+    return dict(json.loads(line), cold_start_seconds=round(cold_start, 3))
+
+
+def check(
+    runs: int = 3,
+    db_path: Optional[str] = None,
+    max_seconds: Optional[float] = None,
+    max_rss_mb: Optional[float] = None,
+) -> List[str]:
+    """Compares the median of ``runs`` cold starts with the budget; returns the violations."""
+    max_seconds = STARTUP_BUDGET_SECONDS if max_seconds is None else max_seconds
+    max_rss_mb = IDLE_RSS_BUDGET_MB if max_rss_mb is None else max_rss_mb
+    results = [probe(db_path) for _ in range(runs)]
+    cold = statistics.median(r["cold_start_seconds"] for r in results)
+    rss_values = [r["idle_rss_mb"] for r in results if r["idle_rss_mb"] is not None]
+    rss = statistics.median(rss_values) if rss_values else None
+    print(json.dumps({"runs": results, "cold_start_seconds": cold, "idle_rss_mb": rss}, indent=2))
+    failures = []
+    if cold > max_seconds:
+        failures.append(f"Kaltstart {cold:.2f} s > Budget {max_seconds:.2f} s")
+    if rss is not None and rss > max_rss_mb:
+        failures.append(f"RSS im Leerlauf {rss:.1f} MB > Budget {max_rss_mb:.1f} MB")
+    loaded = sorted({m for r in results for m in r["lazy_loaded"]})
+    if loaded:
+        failures.append(f"Beim Start geladen, obwohl erst bei Bedarf nötig: {', '.join(loaded)}")
+    return failures
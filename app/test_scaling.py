@@ -0,0 +1,54 @@
+from fractions import Fraction
+
+import pytest
+
+from app.scaling import parse_quantity, scale_ingredient
+
+CASES = [
+    # (line, factor, expected)
+    ("200 g Spaghetti", Fraction(2), "400 g Spaghetti"),
+    ("200 g Spaghetti", Fraction(5), "1 kg Spaghetti"),
+    ("750 ml Brühe", Fraction(2), "1,5 l Brühe"),
+    ("1,5 kg Kartoffeln", Fraction(1, 2), "750 g Kartoffeln"),
+    ("1 l Milch", Fraction(1, 2), "500 ml Milch"),
+    ("1 ½ EL Olivenöl", Fraction(1, 2), "2 ¼ TL Olivenöl"),
+    ("1/2 TL Salz", Fraction(3, 2), "¾ TL Salz"),
+    ("1 gehäufter EL Zucker", Fraction(2), "2 gehäufter EL Zucker"),
+    ("1 Ei", Fraction(2), "2 Eier"),
+    ("2 Eier", Fraction(1, 2), "1 Ei"),
+    ("1 Apfel", Fraction(2), "2 Äpfel"),
+    ("1 Zwiebel", Fraction(2), "2 Zwiebeln"),
+    ("2 große Zwiebeln", Fraction(1, 2), "1 große Zwiebel"),
+    ("2-3 Knoblauchzehen", Fraction(2), "4–6 Knoblauchzehen"),
+    ("1 Prise Salz", Fraction(2), "2 Prisen Salz"),
+    ("1 Prise Salz", Fraction(1, 2), "1 Prise Salz"),
+    ("1 Dose Tomaten (400 g)", Fraction(2), "2 Dosen Tomaten (400 g)"),
+    ("2 Dosen Kichererbsen", Fraction(1, 2), "1 Dose Kichererbsen"),
+    ("1 große Dose Tomaten", Fraction(2), "2 große Dosen Tomaten"),
+    ("1 Stk. Ingwer", Fraction(2), "2 Stk. Ingwer"),
+    ("1.000 ml Wasser", Fraction(2), "2 l Wasser"),
+    ("1.500 g Rinderbraten", Fraction(2), "3 kg Rinderbraten"),
+    ("1.500 g Rinderbraten", Fraction(1, 2), "750 g Rinderbraten"),
+    ("1/0 TL Salz", Fraction(2), "1/0 TL Salz"),
+    ("Salz und Pfeffer", Fraction(2), "Salz und Pfeffer"),
+]
+
+
+@pytest.mark.parametrize("line, factor, expected", CASES)
+def test_scale_ingredient(line, factor, expected):
+    assert scale_ingredient(line, factor) == expected
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("1 ½ EL Olivenöl", (Fraction(3, 2), None, "el")),
+        ("2-3 Knoblauchzehen", (Fraction(2), Fraction(3), None)),
+        ("ca. 200 g Mehl", (Fraction(200), None, "g")),
+        ("1.000 ml Wasser", (Fraction(1000), None, "ml")),
+        ("1/0 TL Salz", None),
+        ("Petersilie zum Bestreuen", None),
+    ],
+)
+def test_parse_quantity(line, expected):
+    assert parse_quantity(line) == expected
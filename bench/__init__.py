@@ -0,0 +1,8 @@
+"""Reproducible performance benchmarks for the recipe app.
+
+- ``bench.corpus``   fills a database with synthetic German recipes
+- ``bench.fake_llm`` local stand-in for the Gemini API (latency/failure injection)
+- ``bench.load``     concurrent load driver with latency percentiles
+- ``bench.run``      orchestrates all of the above and writes a JSON result file
+- ``bench.compare``  compares two result files
+"""
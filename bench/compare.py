@@ -0,0 +1,83 @@
+"""Compares two benchmark result files from ``bench.run``.
+
+    python -m bench.compare bench_results/old.json bench_results/new.json
+
+Prints p50/p95/p99 and throughput per scenario and concurrency level with the
+relative change. With ``--fail-above 10`` the exit code is 1 as soon as a
+latency percentile got more than 10 % slower (or throughput 10 % lower), so
+the comparison can gate a CI job.
+"""
+
+import sys
+import json
+import argparse
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "rps")
+
+
+def _change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(old: dict, new: dict, fail_above=None):
+    """Yields table rows and returns whether a regression exceeded ``fail_above``."""
+    rows = []
+    regressed = False
+    for scenario, levels in new["results"].items():
+        for level, stats in levels.items():
+            before = old.get("results", {}).get(scenario, {}).get(level)
+            if before is None:
+                continue
+            cells = []
+            for metric in METRICS:
+                change = _change(before.get(metric), stats.get(metric))
+                cells.append((before.get(metric), stats.get(metric), change))
+                if fail_above is None or change is None:
+                    continue
+                worse = -change if metric == "rps" else change
+                if worse > fail_above:
+                    regressed = True
+            rows.append((scenario, level, cells, before.get("errors", 0), stats.get("errors", 0)))
+    return rows, regressed
+
+
+def _fmt(cell) -> str:
+    old, new, change = cell
+    if new is None:
+        return f"{'-':>20}"
+    delta = f"{change:+.0f}%" if change is not None else ""
+    return f"{old if old is not None else '-':>8} → {new:<8}{delta:>5}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Zwei Benchmark-Ergebnisse vergleichen")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--fail-above", type=float, default=None,
+                        help="Exit-Code 1 bei Verschlechterung über diesem Prozentwert")
+    args = parser.parse_args(argv)
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"alt: {old['meta']['git_commit']} {old['meta'].get('git_subject', '')}")
+    print(f"neu: {new['meta']['git_commit']} {new['meta'].get('git_subject', '')}")
+    rows, regressed = compare(old, new, args.fail_above)
+    print(f"{'Szenario':>9} {'c':>3}  " + "  ".join(f"{m:^22}" for m in METRICS) + "  Fehler")
+    for scenario, level, cells, errors_old, errors_new in rows:
+        print(f"{scenario:>9} {level:>3}  " + "  ".join(_fmt(c) for c in cells)
+              + f"  {errors_old}→{errors_new}")
+    rss_old = old.get("server", {}).get("rss", {}).get("peak_mb")
+    rss_new = new.get("server", {}).get("rss", {}).get("peak_mb")
+    print(f"RSS peak MB: {rss_old} → {rss_new}")
+    if regressed:
+        print(f"Regression über {args.fail_above} %", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
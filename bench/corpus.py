@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import random
+import argparse
+from typing import Iterator
+
+# Building blocks for plausible German recipes. Titles combine a main
+# ingredient with a dish type ("Kartoffelsuppe"), so compound-word search and
+# the ingredient index see realistic data.
+MAINS = [
+    "Kartoffel", "Tomaten", "Kürbis", "Linsen", "Erbsen", "Spinat", "Pilz",
+    "Zwiebel", "Hähnchen", "Rinder", "Gemüse", "Nudel", "Reis", "Käse", "Lachs",
+    "Bohnen", "Paprika", "Zucchini", "Apfel", "Möhren", "Blumenkohl", "Brokkoli",
+    "Spargel", "Lauch", "Kichererbsen", "Thunfisch", "Schweine", "Feta", "Quark",
+]
+DISHES = [
+    "suppe", "auflauf", "salat", "pfanne", "eintopf", "gratin", "curry", "kuchen",
+    "risotto", "bowl", "strudel", "braten", "gulasch", "puffer", "quiche", "lasagne",
+]
+SUFFIXES = [
+    "", "", "", "mit Speck", "nach Omas Art", "mit Kräutern", "mediterran",
+    "mit Feta", "scharf", "mit Joghurtdip", "aus dem Ofen",
+]
+INGREDIENTS = [
+    ("g", "Kartoffeln"), ("g", "Tomaten"), ("", "Zwiebeln"), ("", "Knoblauchzehen"),
+    ("g", "Reis"), ("g", "Spaghetti"), ("g", "Penne"), ("ml", "Sahne"),
+    ("ml", "Gemüsebrühe"), ("g", "Butter"), ("EL", "Olivenöl"), ("g", "Mehl"),
+    ("", "Eier"), ("ml", "Milch"), ("g", "Feta"), ("g", "Mozzarella"),
+    ("g", "Parmesan"), ("Bund", "Petersilie"), ("Bund", "Basilikum"),
+    ("g", "Linsen"), ("g", "Kichererbsen"), ("ml", "Kokosmilch"), ("TL", "Ingwer"),
+    ("Stange", "Lauch"), ("g", "Champignons"), ("g", "Speck"), ("g", "Hackfleisch"),
+    ("g", "Lachs"), ("", "Paprika"), ("", "Zucchini"), ("", "Karotten"),
+    ("g", "Spinat"), ("EL", "Tomatenmark"), ("TL", "Paprikapulver"),
+    ("TL", "Currypulver"), ("", "Zitrone"), ("EL", "Honig"), ("g", "Joghurt"),
+    ("g", "Kürbis"), ("g", "Brokkoli"), ("Dose", "Bohnen"), ("g", "Erbsen"),
+]
+STEPS = [
+    "{a} waschen, schälen und klein schneiden.",
+    "{a} in einem großen Topf mit etwas Öl anbraten.",
+    "{b} dazugeben und kurz mitdünsten.",
+    "Mit Brühe ablöschen und {t} Minuten köcheln lassen.",
+    "Den Ofen auf 200 °C vorheizen.",
+    "Alles in eine Auflaufform geben und mit {b} bestreuen.",
+    "Mit Salz, Pfeffer und etwas Zitronensaft abschmecken.",
+    "{a} und {b} vermengen und servieren.",
+    "Wasser salzen und zum Kochen bringen.",
+    "Mit frischen Kräutern garnieren.",
+]
+TAGS = [
+    "vegetarisch", "vegan", "schnell", "einfach", "herbst", "sommer", "pasta",
+    "suppe", "ofen", "low carb", "familie", "meal prep", "fisch", "fleisch",
+]
+_AMOUNTS = {"g": [100, 150, 200, 250, 300, 400, 500], "ml": [100, 200, 250, 400, 500],
+            "EL": [1, 2, 3], "TL": [1, 2], "Bund": [1], "Stange": [1, 2], "Dose": [1], "": [1, 2, 3, 4]}
+
+
+def make_recipe(rng: random.Random) -> dict:
+    """One random but plausible recipe in the app's JSON schema."""
+    main = rng.choice(MAINS)
+    title = f"{main}{rng.choice(DISHES)} {rng.choice(SUFFIXES)}".strip()
+    load = rng.randint(1, 3)
+    count = {1: rng.randint(5, 8), 2: rng.randint(9, 14), 3: rng.randint(15, 20)}[load]
+    picked = rng.sample(INGREDIENTS, min(count, len(INGREDIENTS)))
+    ingredients = [
+        f"{rng.choice(_AMOUNTS[unit])} {unit} {name}".replace("  ", " ") for unit, name in picked
+    ] + ["Salz", "Pfeffer"]
+    names = [name for _, name in picked]
+    difficulty = rng.randint(1, 3)
+    steps = [
+        rng.choice(STEPS).format(a=rng.choice(names), b=rng.choice(names), t=rng.choice([10, 15, 20, 30]))
+        for _ in range(rng.randint(3, 3 + 2 * difficulty))
+    ]
+    return {
+        "title": title,
+        "servings": rng.choice([1, 2, 2, 4, 4, 6]),
+        "time_minutes": rng.choice([10, 15, 20, 25, 30, 40, 45, 60, 90, 120]),
+        "difficulty": difficulty,
+        "ingredient_load": load,
+        "tags": rng.sample(TAGS, rng.randint(1, 4)),
+        "ingredients": ingredients,
+        "steps": steps,
+    }
+
+
+def iter_ndjson(count: int, seed: int = 1) -> Iterator[str]:
+    rng = random.Random(seed)
+    for i in range(count):
+        obj = make_recipe(rng)
+        # Spread created_at over ~3 years so keyset pages see realistic data.
+        obj["created_at"] = "20{:02d}-{:02d}-{:02d} {:02d}:{:02d}:00".format(
+            23 + i * 3 // max(count, 1), rng.randint(1, 12), rng.randint(1, 28),
+            rng.randint(0, 23), rng.randint(0, 59),
+        )
+        yield json.dumps(obj, ensure_ascii=False)
+
+
+def build(db_path: str, count: int, seed: int = 1) -> dict:
+    """Creates (or extends) the database at ``db_path`` with ``count`` recipes."""
+    os.environ["DB_PATH"] = db_path
+    from app import db
+
+    db.DB_PATH = db_path
+    db.init_db()
+    report = db.import_recipes(iter_ndjson(count, seed), batch_size=2000, defer_fts=True)
+    db.close_all()
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Synthetischen Rezeptkorpus erzeugen")
+    parser.add_argument("--db", default="bench_corpus.db", help="Zieldatenbank")
+    parser.add_argument("--count", type=int, default=10_000, help="Anzahl Rezepte (1k bis 1M)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--ndjson", action="store_true", help="NDJSON nach stdout statt in die DB")
+    args = parser.parse_args(argv)
+    if args.ndjson:
+        for line in iter_ndjson(args.count, args.seed):
+            sys.stdout.write(line + "\n")
+        return 0
+    report = build(args.db, args.count, args.seed)
+    print(json.dumps(report, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
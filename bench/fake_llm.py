@@ -0,0 +1,172 @@
+"""Local stand-in for the Gemini REST API.
+
+Point the app at it with ``GEMINI_BASE_URL=http://127.0.0.1:8765`` and any
+``GOOGLE_API_KEY``. It answers ``:generateContent`` and
+``:streamGenerateContent`` with the same JSON shape as the real API: a
+synthetic recipe when the request asks for ``application/json`` output
+(generate, parse, photo-to-recipe) and a plain recipe text otherwise (OCR).
+
+Latency and failures are configurable through environment variables:
+
+- ``FAKE_LLM_LATENCY_MS``   base latency per response (default 800)
+- ``FAKE_LLM_JITTER_MS``    uniform jitter added on top (default 400)
+- ``FAKE_LLM_ERROR_RATE``   share of requests answered with HTTP 500 (default 0)
+- ``FAKE_LLM_HANG_RATE``    share of requests that never answer in time (default 0)
+- ``FAKE_LLM_STREAM_CHUNKS`` number of SSE chunks for streaming (default 8)
+- ``FAKE_LLM_SEED``         random seed (default 7)
+
+``GET /_stats`` returns request counters, ``POST /_reset`` clears them.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from bench.corpus import make_recipe
+
+LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "800"))
+JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", "400"))
+ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+HANG_RATE = float(os.getenv("FAKE_LLM_HANG_RATE", "0"))
+STREAM_CHUNKS = max(1, int(os.getenv("FAKE_LLM_STREAM_CHUNKS", "8")))
+HANG_SECONDS = 600
+
+_rng = random.Random(int(os.getenv("FAKE_LLM_SEED", "7")))
+_stats = {"requests": 0, "stream_requests": 0, "errors": 0, "hangs": 0}
+
+app = FastAPI(title="fake-gemini")
+
+
+def _wants_json(body: dict) -> bool:
+    config = body.get("generationConfig") or {}
+    return config.get("responseMimeType") == "application/json"
+
+
+def _prompt_chars(body: dict) -> int:
+    total = 0
+    for content in body.get("contents") or []:
+        for part in content.get("parts") or []:
+            total += len(part.get("text") or "")
+            if "inlineData" in part:
+                total += 258 * 4  # Gemini bills an image as ~258 tokens
+    return total
+
+
+def _answer_text(body: dict) -> str:
+    recipe = make_recipe(_rng)
+    if _wants_json(body):
+        return json.dumps(recipe, ensure_ascii=False)
+    lines = [recipe["title"], "", "Zutaten:"] + [f"- {i}" for i in recipe["ingredients"]]
+    lines += ["", "Zubereitung:"] + [f"{n}. {s}" for n, s in enumerate(recipe["steps"], 1)]
+    return "\n".join(lines)
+
+
+def _payload(text: str, model: str, prompt_chars: int, finish: bool = True) -> dict:
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finish:
+        candidate["finishReason"] = "STOP"
+    prompt_tokens = max(1, prompt_chars // 4)
+    output_tokens = max(1, len(text) // 4)
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        },
+        "modelVersion": model,
+    }
+
+
+def _error(code: int, status: str, message: str) -> JSONResponse:
+    return JSONResponse({"error": {"code": code, "message": message, "status": status}}, status_code=code)
+
+
+def _latency() -> float:
+    return (LATENCY_MS + _rng.uniform(0, JITTER_MS)) / 1000
+
+
+async def _injected_failure() -> JSONResponse | None:
+    """Hangs or returns an error response for the configured share of requests."""
+    roll = _rng.random()
+    if roll < HANG_RATE:
+        _stats["hangs"] += 1
+        await asyncio.sleep(HANG_SECONDS)
+    if roll < HANG_RATE + ERROR_RATE:
+        _stats["errors"] += 1
+        await asyncio.sleep(_latency())
+        return _error(500, "INTERNAL", "Injected failure")
+    return None
+
+
+@app.post("/{version}/models/{model}:generateContent")
+async def generate_content(version: str, model: str, request: Request):
+    _stats["requests"] += 1
+    body = await request.json()
+    failure = await _injected_failure()
+    if failure is not None:
+        return failure
+    await asyncio.sleep(_latency())
+    return _payload(_answer_text(body), model, _prompt_chars(body))
+
+
+@app.post("/{version}/models/{model}:streamGenerateContent")
+async def stream_generate_content(version: str, model: str, request: Request):
+    _stats["requests"] += 1
+    _stats["stream_requests"] += 1
+    body = await request.json()
+    failure = await _injected_failure()
+    if failure is not None:
+        return failure
+    text = _answer_text(body)
+    prompt_chars = _prompt_chars(body)
+    total = _latency()
+    started = time.perf_counter()
+
+    async def events():
+        # The first chunk arrives after a third of the latency and the rest is
+        # spread evenly, roughly how Gemini streams short JSON answers.
+        size = -(-len(text) // STREAM_CHUNKS)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        for n, piece in enumerate(pieces):
+            target = total * (1 + 2 * n / max(len(pieces) - 1, 1)) / 3
+            await asyncio.sleep(max(0.0, target - (time.perf_counter() - started)))
+            last = n == len(pieces) - 1
+            data = _payload(piece, model, prompt_chars if last else 0, finish=last)
+            yield f"data: {json.dumps(data, ensure_ascii=False)}\r\n\r\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/_stats")
+async def stats():
+    return _stats
+
+
+@app.post("/_reset")
+async def reset():
+    for key in _stats:
+        _stats[key] = 0
+    return _stats
+
+
+def main(argv=None) -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Lokaler Gemini-Ersatz für Benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""Concurrent HTTP load driver for a running app instance.
+
+Each scenario is run once per concurrency level: ``concurrency`` workers loop
+over the same request for ``duration`` seconds (after a short warm-up) and
+the per-request latencies are reduced to p50/p95/p99, throughput and errors.
+Redirects are not followed, so a 303 from /save or /delete counts as success.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+SCENARIOS = ("index", "saved", "recipe", "save", "delete", "generate", "stream", "parse", "ocr")
+DEFAULT_SCENARIOS = ("index", "saved", "recipe", "save", "delete", "generate", "stream")
+SEARCH_TERMS = ["kartoffel", "suppe", "curry", "feta", "nudel*", "auflauf", "lachs", "kürbis", "ofen"]
+
+# A 1x1 PNG; a random trailer makes every upload unique so the OCR cache is bypassed.
+_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float, extra: Optional[List[float]] = None) -> dict:
+    values = sorted(latencies)
+    ms = lambda v: None if v is None else round(v * 1000, 2)
+    result = {
+        "requests": len(values) + errors,
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "mean_ms": ms(sum(values) / len(values)) if values else None,
+        "max_ms": ms(values[-1]) if values else None,
+    }
+    if extra:
+        first = sorted(extra)
+        result["first_event_p50_ms"] = ms(percentile(first, 50))
+        result["first_event_p95_ms"] = ms(percentile(first, 95))
+    return result
+
+
+class Driver:
+    """Holds the shared HTTP client and the id pools the scenarios draw from."""
+
+    def __init__(self, base_url: str, seed: int = 3):
+        self.client = httpx.AsyncClient(
+            base_url=base_url, timeout=120, follow_redirects=False,
+            limits=httpx.Limits(max_connections=512, max_keepalive_connections=512),
+        )
+        self.rng = random.Random(seed)
+        self.recipe_ids: List[int] = []
+        self.created_ids: List[int] = []
+        self.first_event: List[float] = []
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def discover_ids(self, pages: int = 5):
+        """Collects existing recipe ids from /api/saved for /recipe/{id}."""
+        cursor = None
+        for _ in range(pages):
+            params = {"cursor": cursor} if cursor else {}
+            page = (await self.client.get("/api/saved", params=params)).json()
+            self.recipe_ids += [item["id"] for item in page["items"]]
+            cursor = page.get("next_cursor")
+            if not cursor:
+                break
+
+    # Each scenario returns True on success, False on failure and None for
+    # unmeasured setup work.
+
+    async def index(self) -> bool:
+        resp = await self.client.get("/")
+        return resp.status_code == 200
+
+    async def saved(self) -> bool:
+        resp = await self.client.get("/saved", params={"q": self.rng.choice(SEARCH_TERMS)})
+        return resp.status_code == 200
+
+    async def recipe(self) -> bool:
+        if not self.recipe_ids:
+            return False
+        resp = await self.client.get(f"/recipe/{self.rng.choice(self.recipe_ids)}")
+        return resp.status_code == 200
+
+    async def save(self) -> bool:
+        from bench.corpus import make_recipe
+
+        r = make_recipe(self.rng)
+        resp = await self.client.post("/save", data={
+            "title": r["title"], "servings": r["servings"], "time_minutes": r["time_minutes"],
+            "difficulty": r["difficulty"], "ingredient_load": r["ingredient_load"],
+            "tags": ", ".join(r["tags"]), "ingredients": "\n".join(r["ingredients"]),
+            "steps": "\n".join(r["steps"]),
+            # Corpus recipes come from a few templates, so many would get the
+            # near-duplicate 409; measure the save itself.
+            "force": "1",
+        })
+        if resp.status_code != 303:
+            return False
+        location = resp.headers.get("location", "")
+        try:
+            self.created_ids.append(int(location.split("/recipe/")[1].split("?")[0]))
+        except (IndexError, ValueError):
+            pass
+        return True
+
+    async def delete(self) -> Optional[bool]:
+        # Only delete what the save scenario created, so the corpus stays intact.
+        if not self.created_ids:
+            await self.save()
+            return None
+        rid = self.created_ids.pop()
+        resp = await self.client.post(f"/delete/{rid}")
+        return resp.status_code == 303
+
+    async def generate(self) -> bool:
+        resp = await self.client.post("/generate", data={
+            "difficulty": self.rng.randint(1, 3), "ingredient_load": self.rng.randint(1, 3),
+            "servings": 2, "ingredients": "", "fresh": "true",
+        })
+        return resp.status_code == 200
+
+    async def stream(self) -> bool:
+        params = {"difficulty": self.rng.randint(1, 3), "ingredient_load": self.rng.randint(1, 3),
+                  "servings": 2, "fresh": "true"}
+        started = time.perf_counter()
+        first = None
+        ok = False
+        async with self.client.stream("GET", "/generate/stream", params=params) as resp:
+            async for line in resp.aiter_lines():
+                if line.startswith("event: ") and first is None:
+                    first = time.perf_counter() - started
+                if line == "event: done":
+                    ok = True
+                elif line == "event: error":
+                    ok = False
+        if first is not None:
+            self.first_event.append(first)
+        return ok
+
+    async def parse(self) -> bool:
+        text = "\n".join(["Omas Apfelkuchen", "200 g Mehl", "3 Äpfel", "100 g Zucker",
+                          "Alles verrühren und 40 Minuten backen.", str(self.rng.random())])
+        resp = await self.client.post("/ocr/parse", data={"raw_text": text})
+        return resp.status_code == 200
+
+    async def ocr(self) -> bool:
+        image = _PNG + self.rng.randbytes(16)
+        resp = await self.client.post("/ocr", files={"file": ("rezept.png", image, "image/png")})
+        return resp.status_code == 200
+
+
+async def _run_level(call: Callable[[], Awaitable[Optional[bool]]], concurrency: int, duration: float,
+                     warmup: float, on_measure: Optional[Callable[[], None]] = None) -> tuple:
+    latencies: List[float] = []
+    errors = 0
+    measuring = False
+    stop_at = time.perf_counter() + warmup + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                ok = await call()
+            except httpx.HTTPError:
+                ok = False
+            if not measuring or ok is None:
+                continue
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    await asyncio.sleep(warmup)
+    measuring = True
+    if on_measure is not None:
+        on_measure()
+    measured_from = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return latencies, errors, time.perf_counter() - measured_from
+
+
+async def run(base_url: str, scenarios=DEFAULT_SCENARIOS, concurrency=(1, 4, 16),
+              duration: float = 10.0, warmup: float = 1.0) -> Dict[str, Dict[str, dict]]:
+    """Runs every scenario at every concurrency level; returns nested result dicts."""
+    driver = Driver(base_url)
+    results: Dict[str, Dict[str, dict]] = {}
+    try:
+        await driver.discover_ids()
+        for name in scenarios:
+            results[name] = {}
+            for level in concurrency:
+                latencies, errors, elapsed = await _run_level(
+                    getattr(driver, name), level, duration, warmup, driver.first_event.clear
+                )
+                results[name][str(level)] = summarize(latencies, errors, elapsed, driver.first_event)
+                print(f"{name:>9} c={level:<3} {json.dumps(results[name][str(level)])}", file=sys.stderr)
+    finally:
+        await driver.close()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Lasttest gegen eine laufende App-Instanz")
+    parser.add_argument("--url", default=os.getenv("BENCH_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS),
+                        help=f"Kommagetrennt aus: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--duration", type=float, default=10.0, help="Sekunden pro Stufe")
+    parser.add_argument("--warmup", type=float, default=1.0)
+    args = parser.parse_args(argv)
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unbekannte Szenarien: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    results = asyncio.run(run(args.url, scenarios, levels, args.duration, args.warmup))
+    json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
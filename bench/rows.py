@@ -0,0 +1,92 @@
+"""Per-row cost of the recipe read paths, per storage format.
+
+    python -m bench.rows --count 10000 --rows 2000
+
+Copies the corpus database once per storage format (json, compact, zlib),
+reads ``--rows`` rows into memory and times, per row, turning a row into
+API JSON three ways:
+
+    validate   json.loads + Recipe(**data) + model_dump_json (the old path)
+    construct  Recipe.model_construct + model_dump_json (skips validators)
+    splice     db._row_json: the stored document with id/slug spliced in,
+               what /api/v1/recipes returns
+
+plus the object-only part that the HTML pages need: ``validate_obj``,
+``construct_obj`` and ``json_obj`` (db._row_recipe, model_validate_json on
+the spliced document). No server involved; results go to stdout as JSON.
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+
+from bench.run import _copy_db, corpus_path
+
+
+def _per_row_us(fn, rows, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for row in rows:
+            fn(row)
+        best = min(best, time.perf_counter() - started)
+    return round(best / len(rows) * 1e6, 2)
+
+
+def measure(db_path: str, fmt: str, rows: int, repeat: int) -> dict:
+    from app import db
+    from app.schemas import Recipe
+
+    db.DB_PATH = db_path
+    db.close_all()
+    db.init_db()
+    db.convert_storage(fmt)
+    with db.get_conn(readonly=True) as conn:
+        sample = conn.execute("SELECT * FROM recipes ORDER BY id LIMIT ?", (rows,)).fetchall()
+    db.close_all()
+
+    def validate_obj(row):
+        return Recipe(**db._row_data(row))
+
+    def construct_obj(row):
+        return Recipe.model_construct(**db._row_data(row))
+
+    paths = {
+        "validate": lambda row: validate_obj(row).model_dump_json(),
+        "construct": lambda row: construct_obj(row).model_dump_json(),
+        "splice": db._row_json,
+        "validate_obj": validate_obj,
+        "construct_obj": construct_obj,
+        "json_obj": db._row_recipe,
+    }
+    out = {name: _per_row_us(fn, sample, repeat) for name, fn in paths.items()}
+    out["speedup_splice"] = round(out["validate"] / out["splice"], 1)
+    return out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Kosten pro Zeile der Lesepfade messen")
+    parser.add_argument("--count", type=int, default=10_000, help="Korpusgröße")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", help="Vorhandene Datenbank statt generiertem Korpus (wird kopiert)")
+    parser.add_argument("--rows", type=int, default=2000, help="Gemessene Zeilen")
+    parser.add_argument("--repeat", type=int, default=5, help="Durchläufe, gewertet wird der schnellste")
+    args = parser.parse_args(argv)
+
+    src = args.db or corpus_path(args.count, args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("json", "compact", "zlib"):
+            path = os.path.join(tmp, f"{fmt}.db")
+            _copy_db(src, path)
+            results[fmt] = measure(path, fmt, args.rows, args.repeat)
+            print(f"{fmt}: {json.dumps(results[fmt])}", file=sys.stderr)
+    print(json.dumps({"unit": "µs/row", "rows": args.rows, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
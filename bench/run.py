@@ -0,0 +1,249 @@
+"""End-to-end benchmark run: corpus -> fake LLM -> app -> load -> JSON result.
+
+    python -m bench.run --count 10000 --duration 10
+
+Starts ``bench.fake_llm`` and the app (uvicorn, one worker, like on the Pi)
+as subprocesses, drives them with ``bench.load`` and writes
+``bench_results/<timestamp>-<commit>.json``. The corpus database is built
+once per size/seed and copied for every run, so /save and /delete never
+change the baseline. The result also records the server's peak RSS, its
+startup time and whether the PRD targets were met at concurrency 1.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import asyncio
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+
+from bench import corpus, load
+
+RESULTS_DIR = os.getenv("BENCH_RESULTS_DIR", "bench_results")
+
+# PRD targets, checked against the single-user (concurrency 1) numbers.
+TARGETS = [
+    ("generate", "p50_ms", 6000, "Time-to-First-Recipe < 6 s (Median)"),
+    ("index", "p95_ms", 1000, "UI first paint < 1 s"),
+    ("stream", "first_event_p95_ms", 1000, "Erstes Teilergebnis < 1 s"),
+    ("saved", "p95_ms", 150, "Suchlatenz < 150 ms"),
+]
+RSS_TARGET_MB = 200
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """Resident set size from /proc (Linux only, like the Pi)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, pid: int, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.pid, self.interval = pid, interval
+        self.samples = []
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            value = _rss_mb(self.pid)
+            if value is not None:
+                self.samples.append(value)
+            self._done.wait(self.interval)
+
+    def stop(self) -> dict:
+        self._done.set()
+        self.join()
+        if not self.samples:
+            return {"peak_mb": None, "end_mb": None}
+        return {"peak_mb": round(max(self.samples), 1), "end_mb": round(self.samples[-1], 1)}
+
+
+def corpus_path(count: int, seed: int) -> str:
+    path = os.path.join(RESULTS_DIR, "corpus", f"recipes-{count}-s{seed}.db")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        print(f"Baue Korpus mit {count} Rezepten: {path}", file=sys.stderr)
+        report = corpus.build(path + ".tmp", count, seed)
+        os.replace(path + ".tmp", path)
+        print(json.dumps(report), file=sys.stderr)
+    return path
+
+
+def _copy_db(src: str, dst: str):
+    with sqlite3.connect(src) as source, sqlite3.connect(dst) as target:
+        source.backup(target)
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 60) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Prozess beendet mit Code {proc.returncode}: {url}")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"Nicht erreichbar nach {timeout} s: {url}")
+
+
+def _stop(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def check_targets(results: dict, rss: dict) -> list:
+    checks = []
+    for scenario, metric, limit, label in TARGETS:
+        value = results.get(scenario, {}).get("1", {}).get(metric)
+        if value is not None:
+            checks.append({"target": label, "value": value, "limit": limit, "ok": value < limit})
+    if rss.get("peak_mb") is not None:
+        checks.append({"target": f"RAM < {RSS_TARGET_MB} MB", "value": rss["peak_mb"],
+                       "limit": RSS_TARGET_MB, "ok": rss["peak_mb"] < RSS_TARGET_MB})
+    return checks
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reproduzierbarer Benchmark-Lauf")
+    parser.add_argument("--count", type=int, default=10_000, help="Korpusgröße")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", help="Vorhandene Datenbank statt generiertem Korpus (wird kopiert)")
+    parser.add_argument("--scenarios", default=",".join(load.DEFAULT_SCENARIOS))
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--llm-port", type=int, default=8765)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=400)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-hang-rate", type=float, default=0.0)
+    parser.add_argument("--label", default="", help="Freitext für die Ergebnisdatei")
+    parser.add_argument("--out", help="Ergebnisdatei (Standard: bench_results/<zeit>-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    source_db = args.db or corpus_path(args.count, args.seed)
+    workdir = tempfile.mkdtemp(prefix="recipes-bench-")
+    run_db = os.path.join(workdir, "recipes.db")
+    _copy_db(source_db, run_db)
+
+    llm_env = {
+        **os.environ,
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "FAKE_LLM_JITTER_MS": str(args.llm_jitter_ms),
+        "FAKE_LLM_ERROR_RATE": str(args.llm_error_rate),
+        "FAKE_LLM_HANG_RATE": str(args.llm_hang_rate),
+    }
+    app_env = {
+        **os.environ,
+        "DB_PATH": run_db,
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.db"),
+        "GEMINI_BASE_URL": f"http://127.0.0.1:{args.llm_port}",
+        "GOOGLE_API_KEY": os.getenv("BENCH_API_KEY", "bench"),
+        "RECIPE_POOL_SIZE": "0",
+    }
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "bench.fake_llm", "--port", str(args.llm_port)], env=llm_env
+    )
+    server = None
+    try:
+        _wait_ready(f"http://127.0.0.1:{args.llm_port}/_stats", fake)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+             "--log-level", "warning"],
+            env=app_env,
+        )
+        startup_seconds = _wait_ready(f"http://127.0.0.1:{args.port}/health", server)
+        idle_rss = _rss_mb(server.pid)
+        sampler = RssSampler(server.pid)
+        sampler.start()
+        started = time.perf_counter()
+        results = asyncio.run(load.run(
+            f"http://127.0.0.1:{args.port}", scenarios, levels, args.duration, args.warmup
+        ))
+        wall = time.perf_counter() - started
+        rss = sampler.stop()
+        rss["idle_mb"] = round(idle_rss, 1) if idle_rss is not None else None
+        llm_stats = httpx.get(f"http://127.0.0.1:{args.llm_port}/_stats").json()
+    finally:
+        if server is not None:
+            _stop(server)
+        _stop(fake)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with sqlite3.connect(source_db) as conn:
+        recipes = conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "label": args.label,
+            "git_commit": commit,
+            "git_subject": _git("log", "-1", "--format=%s"),
+            "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "recipes": recipes,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "concurrency": levels,
+            "fake_llm": {
+                "latency_ms": args.llm_latency_ms, "jitter_ms": args.llm_jitter_ms,
+                "error_rate": args.llm_error_rate, "hang_rate": args.llm_hang_rate,
+            },
+        },
+        "server": {"startup_seconds": round(startup_seconds, 3), "rss": rss, "llm_calls": llm_stats},
+        "wall_seconds": round(wall, 1),
+        "results": results,
+        "targets": check_targets(results, rss),
+    }
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"{stamp}-{commit}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    for check in report["targets"]:
+        mark = "✅" if check["ok"] else "❌"
+        print(f"{mark} {check['target']}: {check['value']} (Grenze {check['limit']})", file=sys.stderr)
+    print(out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())